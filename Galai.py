@@ -1,139 +1,255 @@
 # gravitace.py
 # GPU-akcelerovaný gravitační simulátor pixelů pomocí pygame + numba
+#
+# Bez okna lze běh nahrát do souboru a vykreslit později (viz galaxie_render.py):
+#   python Galai.py --record galaxie.npy --particles 1000000 --frames 600 --stride 2
 
 import pygame
 import numpy as np
-from numba import njit, prange
+import argparse
 import ctypes
 import random
 import sys
+import time
 
-pygame.init()
+# Jádra se přeloží (nebo načtou z cache) už při importu, ještě před otevřením okna
+from jadra_galaxie import (DensityMap, ParticleMesh, apply_galaxy_gravity_and_update, compact_particles,
+                           startup_report)
+from galaxie import BLACK, COLOR_BANDS, RECORD_HEIGHT, RECORD_WIDTH, WHITE, get_color
+from texty import load_font, render_text
 
-# Zjisti rozlišení obrazovky a nastav formát 16:9
-user32 = ctypes.windll.user32
-screen_width = user32.GetSystemMetrics(0)
-screen_height = int(screen_width * 9 / 16)
-
-screen = pygame.display.set_mode((screen_width, screen_height))
-pygame.display.set_caption("Tvorba Galaxie")
-
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-
-SUN_X, SUN_Y = screen_width / 2, screen_height / 2
 SUN_MASS = 200.0
 G = 1.0
 
+EVENT_HORIZON = 4.0  # částice blíž než tohle černá díra pohltí
+SWIRL = 0.05         # umělé víření, když disk nemá vlastní gravitaci
+
+# Vlastní gravitace disku (particle-mesh, klávesa P)
+PM_CELLS = 256              # buněk mřížky podél delší strany okna
+DISK_MASS_FRACTION = 0.5    # hmotnost celého disku jako část hmotnosti černé díry
+
 num_particles = 1000
-speed_multiplier = 1.0
-
-positions = np.random.rand(num_particles, 2).astype(np.float32)
-positions[:, 0] *= screen_width
-positions[:, 1] *= screen_height
-
-masses = np.ones(num_particles, dtype=np.float32)
-
-velocities = np.zeros((num_particles, 2), dtype=np.float32)
-dx = positions[:, 0] - SUN_X
-dy = positions[:, 1] - SUN_Y
-dist = np.sqrt(dx**2 + dy**2)
-speed = np.sqrt(G * SUN_MASS / (dist + 1e-5))
-velocities[:, 0] = -dy / dist * speed
-velocities[:, 1] = dx / dist * speed
-
-@njit(parallel=True)
-def apply_gravity_and_update(positions, velocities, masses, sun_x, sun_y, sun_mass, g, speed_multiplier):
-    for i in prange(positions.shape[0]):
-        dx = sun_x - positions[i, 0]
-        dy = sun_y - positions[i, 1]
-        dist_sq = dx*dx + dy*dy
-        dist = np.sqrt(dist_sq)
-        if dist < 1:
-            continue
-        force = g * masses[i] * sun_mass / dist_sq
-        ax = force * dx / dist / masses[i]
-        ay = force * dy / dist / masses[i]
-
-        # Víření - slabé zakřivení pohybu
-        perp = 0.05
-        ax += perp * -dy / (dist + 1e-5)
-        ay += perp * dx / (dist + 1e-5)
-
-        velocities[i, 0] += ax
-        velocities[i, 1] += ay
-
-        positions[i, 0] += velocities[i, 0] * speed_multiplier
-        positions[i, 1] += velocities[i, 1] * speed_multiplier
-
-def get_color(distance):
-    if distance < 100:
-        return (255, 255, 255)  # bílá
-    elif distance < 200:
-        return (255, 255, 0)    # žlutá
-    elif distance < 300:
-        return (255, 165, 0)    # oranžová
-    elif distance < 400:
-        return (255, 0, 0)      # červená
-    else:
-        return (128, 0, 255)    # fialová
-
-font = pygame.font.SysFont(None, 24)
-def draw_info():
-    np_text = font.render(f"Počet částic: {positions.shape[0]}", True, (200, 200, 200))
-    sp_text = font.render(f"Rychlost: {speed_multiplier:.1f}x", True, (200, 200, 200))
-    screen.blit(np_text, (20, screen_height - 40))
-    screen.blit(sp_text, (20, screen_height - 20))
-
-clock = pygame.time.Clock()
-running = True
-
-while running:
-    screen.fill(BLACK)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
+
+# Nad tolik částic se začíná v režimu záře (G přepíná), kolečka by splynula
+GLOW_THRESHOLD = 20000
+
+def make_particles(count, width, height):
+    # Náhodně po ploše, na kruhové dráze kolem černé díry uprostřed
+    sun_x, sun_y = width / 2, height / 2
+    new_pos = np.random.rand(count, 2).astype(np.float32)
+    new_pos[:, 0] *= width
+    new_pos[:, 1] *= height
+    new_mass = np.ones(count, dtype=np.float32)
+    new_vel = np.zeros((count, 2), dtype=np.float32)
+    dx = new_pos[:, 0] - sun_x
+    dy = new_pos[:, 1] - sun_y
+    dist = np.sqrt(dx**2 + dy**2)
+    spd = np.sqrt(G * SUN_MASS / (dist + 1e-5))
+    new_vel[:, 0] = -dy / dist * spd
+    new_vel[:, 1] = dx / dist * spd
+    return new_pos, new_vel, new_mass
+
+class ParticleStore:
+    # Pole s rezervou, která rostou geometricky; ven jdou jen pohledy na aktivní část.
+    # Pohlcené částice se vyřadí přesunem poslední na jejich místo, takže řádek není stálá částice -
+    # tu určuje číslo v ids (pořadí vzniku).
+    def __init__(self, capacity):
+        self.count = 0
+        self.spawned = 0
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        positions = np.empty((capacity, 2), dtype=np.float32)
+        velocities = np.empty((capacity, 2), dtype=np.float32)
+        masses = np.empty(capacity, dtype=np.float32)
+        ids = np.empty(capacity, dtype=np.int64)
+        alive = np.ones(capacity, dtype=np.uint8)
+        if self.count:
+            positions[:self.count] = self._positions[:self.count]
+            velocities[:self.count] = self._velocities[:self.count]
+            masses[:self.count] = self._masses[:self.count]
+            ids[:self.count] = self._ids[:self.count]
+        self._positions = positions
+        self._velocities = velocities
+        self._masses = masses
+        self._ids = ids
+        self._alive = alive
+
+    @property
+    def capacity(self):
+        return self._masses.shape[0]
+
+    @property
+    def positions(self):
+        return self._positions[:self.count]
+
+    @property
+    def velocities(self):
+        return self._velocities[:self.count]
+
+    @property
+    def masses(self):
+        return self._masses[:self.count]
+
+    @property
+    def ids(self):
+        return self._ids[:self.count]
+
+    @property
+    def alive(self):
+        return self._alive[:self.count]
+
+    def spawn(self, new_pos, new_vel, new_mass):
+        start = self.count
+        end = start + new_pos.shape[0]
+        if end > self.capacity:
+            self.allocate(max(end, 2 * self.capacity))
+        self._positions[start:end] = new_pos
+        self._velocities[start:end] = new_vel
+        self._masses[start:end] = new_mass
+        self._ids[start:end] = np.arange(self.spawned, self.spawned + end - start)
+        self.spawned += end - start
+        self.count = end
+
+    def compact(self):
+        self.count = compact_particles(self._positions, self._velocities, self._masses, self._alive, self._ids,
+                                       self.count)
+
+def step(particles, sun_x, sun_y, speed_multiplier, mesh=None):
+    # S mřížkou se disk přitahuje sám a spirály vznikají bez umělého víření
+    swirl = SWIRL
+    if mesh is not None and particles.count:
+        mesh.kick(particles.positions, particles.velocities, particles.masses,
+                  DISK_MASS_FRACTION * SUN_MASS / particles.count)
+        swirl = 0.0
+    swallowed = apply_galaxy_gravity_and_update(particles.positions, particles.velocities, particles.masses,
+                                                particles.alive, sun_x, sun_y, SUN_MASS, G, speed_multiplier,
+                                                EVENT_HORIZON, swirl)
+    if swallowed:
+        particles.compact()
+
+# Barvy pásem pro záři
+GLOW_PALETTE = np.array([get_color(d) for d in [0] + list(COLOR_BANDS)], dtype=np.float32)
+
+def record(path, count, frames, stride, speed_multiplier=1.0, self_gravity=False):
+    # Bez okna: každý stride-tý krok zapíše pozice (float32) jako snímek do .npy mapovaného do paměti.
+    # Řádek snímku je vždy stejná částice (podle ids), pohlcené částice mají v dalších snímcích NaN.
+    # S numba se během nahrávání (i s --pm) nic nealokuje.
+    width, height = RECORD_WIDTH, RECORD_HEIGHT
+    particles = ParticleStore(count)
+    particles.spawn(*make_particles(count, width, height))
+    mesh = ParticleMesh(width, height, PM_CELLS, G) if self_gravity else None
+    trajectory = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(frames, count, 2))
+
+    start = time.perf_counter()
+    for frame in range(frames):
+        for _ in range(stride):
+            step(particles, width / 2, height / 2, speed_multiplier, mesh)
+        trajectory[frame] = np.nan
+        trajectory[frame, particles.ids] = particles.positions
+        if (frame + 1) % 50 == 0 or frame + 1 == frames:
+            elapsed = time.perf_counter() - start
+            print(f"{frame + 1}/{frames} snímků, {particles.count} částic, {(frame + 1) / elapsed:.1f} snímků/s")
+    trajectory.flush()
+    del trajectory
+
+def main(count=num_particles, self_gravity=False):
+    pygame.init()
+
+    # Zjisti rozlišení obrazovky a nastav formát 16:9
+    user32 = ctypes.windll.user32
+    screen_width = user32.GetSystemMetrics(0)
+    screen_height = int(screen_width * 9 / 16)
+
+    screen = pygame.display.set_mode((screen_width, screen_height))
+    pygame.display.set_caption("Tvorba Galaxie")
+
+    SUN_X, SUN_Y = screen_width / 2, screen_height / 2
+    speed_multiplier = 1.0
+    glow = count > GLOW_THRESHOLD
+    density = None  # Mřížka záře až při prvním snímku v tom režimu
+    mesh = None  # Mřížka vlastní gravitace až při prvním zapnutí (P nebo --pm)
+
+    particles = ParticleStore(max(count, 1024))
+    particles.spawn(*make_particles(count, screen_width, screen_height))
+
+    font = load_font(None, 24)
+    def draw_info():
+        np_text = render_text(font, f"Počet částic: {particles.count}", (200, 200, 200))
+        sp_text = render_text(font, f"Rychlost: {speed_multiplier:.1f}x", (200, 200, 200))
+        mode_text = render_text(font, f"Zobrazení: {'záře' if glow else 'částice'} (G)", (200, 200, 200))
+        pm_text = render_text(font, f"Gravitace disku: {'zapnutá' if self_gravity else 'vypnutá'} (P)",
+                              (200, 200, 200))
+        screen.blit(pm_text, (20, screen_height - 80))
+        screen.blit(mode_text, (20, screen_height - 60))
+        screen.blit(np_text, (20, screen_height - 40))
+        screen.blit(sp_text, (20, screen_height - 20))
+
+    clock = pygame.time.Clock()
+    running = True
+
+    while running:
+        screen.fill(BLACK)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
                 running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                speed_multiplier = min(speed_multiplier + 0.2, 10.0)
-            elif event.button == 3:
-                new_count = 100
-                new_pos = np.random.rand(new_count, 2).astype(np.float32)
-                new_pos[:, 0] *= screen_width
-                new_pos[:, 1] *= screen_height
-                new_mass = np.ones(new_count, dtype=np.float32)
-                new_vel = np.zeros((new_count, 2), dtype=np.float32)
-                dx = new_pos[:, 0] - SUN_X
-                dy = new_pos[:, 1] - SUN_Y
-                dist = np.sqrt(dx**2 + dy**2)
-                spd = np.sqrt(G * SUN_MASS / (dist + 1e-5))
-                new_vel[:, 0] = -dy / dist * spd
-                new_vel[:, 1] = dx / dist * spd
-                positions = np.vstack((positions, new_pos))
-                masses = np.hstack((masses, new_mass))
-                velocities = np.vstack((velocities, new_vel))
-            elif event.button == 4:
-                speed_multiplier = min(speed_multiplier + 0.1, 10.0)
-            elif event.button == 5:
-                speed_multiplier = max(speed_multiplier - 0.1, 0.1)
-
-    apply_gravity_and_update(positions, velocities, masses, SUN_X, SUN_Y, SUN_MASS, G, speed_multiplier)
-
-    # Černá díra s bílým okrajem
-    pygame.draw.circle(screen, WHITE, (int(SUN_X), int(SUN_Y)), 6)
-    pygame.draw.circle(screen, BLACK, (int(SUN_X), int(SUN_Y)), 4)
-
-    for i in range(positions.shape[0]):
-        dist = np.sqrt((positions[i, 0] - SUN_X) ** 2 + (positions[i, 1] - SUN_Y) ** 2)
-        color = get_color(dist)
-        pygame.draw.circle(screen, color, (int(positions[i, 0]), int(positions[i, 1])), 2)
-
-    draw_info()
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
-sys.exit()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_g:
+                    glow = not glow
+                elif event.key == pygame.K_p:
+                    self_gravity = not self_gravity
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:
+                    speed_multiplier = min(speed_multiplier + 0.2, 10.0)
+                elif event.button == 3:
+                    particles.spawn(*make_particles(100, screen_width, screen_height))
+                elif event.button == 4:
+                    speed_multiplier = min(speed_multiplier + 0.1, 10.0)
+                elif event.button == 5:
+                    speed_multiplier = max(speed_multiplier - 0.1, 0.1)
+
+        if self_gravity and mesh is None:
+            mesh = ParticleMesh(screen_width, screen_height, PM_CELLS, G)
+        step(particles, SUN_X, SUN_Y, speed_multiplier, mesh if self_gravity else None)
+
+        positions = particles.positions
+        if glow:
+            # Hustota částic na pixel v logaritmické škále, celé okno jedním zápisem
+            if density is None:
+                density = DensityMap(screen_width, screen_height)
+            pixels = pygame.surfarray.pixels3d(screen)
+            density.draw(pixels, positions, SUN_X, SUN_Y, COLOR_BANDS, GLOW_PALETTE)
+            del pixels
+        else:
+            for i in range(positions.shape[0]):
+                dist = np.sqrt((positions[i, 0] - SUN_X) ** 2 + (positions[i, 1] - SUN_Y) ** 2)
+                color = get_color(dist)
+                pygame.draw.circle(screen, color, (int(positions[i, 0]), int(positions[i, 1])), 2)
+
+        # Černá díra s bílým okrajem
+        pygame.draw.circle(screen, WHITE, (int(SUN_X), int(SUN_Y)), 6)
+        pygame.draw.circle(screen, BLACK, (int(SUN_X), int(SUN_Y)), 4)
+
+        draw_info()
+        pygame.display.flip()
+        clock.tick(60)
+
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tvorba galaxie")
+    parser.add_argument("--record", metavar="SOUBOR", help="bez okna nahrát trajektorie do .npy")
+    parser.add_argument("--particles", type=int, default=num_particles)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--stride", type=int, default=1, help="kroků simulace mezi nahranými snímky")
+    parser.add_argument("--pm", action="store_true", help="vlastní gravitace disku (particle-mesh)")
+    args = parser.parse_args()
+
+    print(startup_report())
+    if args.record:
+        record(args.record, args.particles, args.frames, args.stride, self_gravity=args.pm)
+    else:
+        main(args.particles, args.pm)
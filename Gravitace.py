@@ -3,10 +3,19 @@
 
 import pygame
 import numpy as np
-from numba import njit, prange
 import ctypes
+import queue
 import random
 import sys
+import threading
+import time
+
+# Jádra se přeloží (nebo načtou z cache) už při importu, ještě před otevřením okna
+from jadra_gravitace import (INTEGRATOR_LEAPFROG, INTEGRATOR_NAMES, QuadTree, apply_gravity_and_update,
+                             draw_particles, energy_and_momentum, startup_report)
+from texty import load_font, render_text
+
+print(startup_report())
 
 pygame.init()
 
@@ -25,40 +34,54 @@ SUN_X, SUN_Y = screen_width / 2, screen_height / 2
 SUN_MASS = 200.0
 G = 1.0
 
+# Tabulka přitahovačů, řádek = x, y, hmotnost; na začátku jen slunce.
+# Klávesa A přidá přitahovač pod myší, Delete odebere nejbližší, levým tlačítkem se přetahují.
+ATTRACTOR_MASS = 50.0
+MAX_ATTRACTORS = 32
+
+def attractor_radius(mass):
+    return max(3, int(10 * (mass / SUN_MASS) ** 0.5))
+
+def attractor_at(attractors, pos):
+    # Index přitahovače pod myší nebo None
+    dist = np.hypot(attractors[:, 0] - pos[0], attractors[:, 1] - pos[1])
+    k = int(np.argmin(dist))
+    if dist[k] <= attractor_radius(attractors[k, 2]) + 5:
+        return k
+    return None
+
+def orbit_velocities(pos, attractors):
+    # Kruhová rychlost kolem těžiště všech přitahovačů
+    total_mass = attractors[:, 2].sum()
+    center_x, center_y = np.average(attractors[:, :2], axis=0, weights=attractors[:, 2])
+    vel = np.zeros_like(pos)
+    dx = pos[:, 0] - center_x
+    dy = pos[:, 1] - center_y
+    dist = np.sqrt(dx**2 + dy**2)
+    spd = np.sqrt(G * total_mass / (dist + 1e-5))
+    vel[:, 0] = -dy / dist * spd
+    vel[:, 1] = dx / dist * spd
+    return vel
+
+def random_positions(count):
+    pos = np.random.rand(count, 2).astype(np.float32)
+    pos[:, 0] *= screen_width
+    pos[:, 1] *= screen_height
+    return pos
+
 num_particles = 1000
-speed_multiplier = 1.0
-
-positions = np.random.rand(num_particles, 2).astype(np.float32)
-positions[:, 0] *= screen_width
-positions[:, 1] *= screen_height
-
-masses = np.ones(num_particles, dtype=np.float32)
-
-velocities = np.zeros((num_particles, 2), dtype=np.float32)
-dx = positions[:, 0] - SUN_X
-dy = positions[:, 1] - SUN_Y
-dist = np.sqrt(dx**2 + dy**2)
-speed = np.sqrt(G * SUN_MASS / (dist + 1e-5))
-velocities[:, 0] = -dy / dist * speed
-velocities[:, 1] = dx / dist * speed
-
-@njit(parallel=True)
-def apply_gravity_and_update(positions, velocities, masses, sun_x, sun_y, sun_mass, g, speed_multiplier):
-    for i in prange(positions.shape[0]):
-        dx = sun_x - positions[i, 0]
-        dy = sun_y - positions[i, 1]
-        dist_sq = dx*dx + dy*dy
-        dist = np.sqrt(dist_sq)
-        if dist < 1:
-            continue
-        force = g * masses[i] * sun_mass / dist_sq
-        ax = force * dx / dist / masses[i]
-        ay = force * dy / dist / masses[i]
-        velocities[i, 0] += ax
-        velocities[i, 1] += ay
-
-        positions[i, 0] += velocities[i, 0] * speed_multiplier
-        positions[i, 1] += velocities[i, 1] * speed_multiplier
+
+# Integrátor se přepíná klávesou I, počet kroků na snímek klávesami +/-
+MAX_SUBSTEPS = 64
+
+# Vzájemná gravitace částic (Barnes-Hut), zapíná se klávesou N
+BH_THETA = 0.7        # otevírací úhel - menší je přesnější, ale pomalejší
+BH_SOFTENING = 5.0    # změkčení, aby blízké dvojice nevystřelily
+
+# Fyzika běží ve vlastním vlákně s vlastní frekvencí, vykreslování má svou (klávesy [ ] a , .)
+PHYSICS_RATES = (15, 30, 60, 120, 240, 480)
+RENDER_RATES = (15, 30, 60, 120, 144, 240)
+DRIFT_INTERVAL = 10   # po kolika krocích fyziky se přepočítá drift
 
 def get_color(distance):
     if distance < 100:
@@ -72,15 +95,179 @@ def get_color(distance):
     else:
         return (0, 128, 255)
 
-font = pygame.font.SysFont(None, 24)
-def draw_info():
-    np_text = font.render(f"Počet částic: {positions.shape[0]}", True, (200, 200, 200))
-    sp_text = font.render(f"Rychlost: {speed_multiplier:.1f}x", True, (200, 200, 200))
-    screen.blit(np_text, (20, screen_height - 40))
-    screen.blit(sp_text, (20, screen_height - 20))
+# Hranice barevných pásem podle vzdálenosti od nejbližšího přitahovače (viz get_color)
+COLOR_BANDS = np.array([100, 200, 300, 400], dtype=np.float32)
+
+# Barvy pásem převedené do formátu obrazovky, jedna položka na pásmo
+palette = np.array([screen.map_rgb(get_color(d)) for d in [0] + list(COLOR_BANDS)], dtype=np.uint32)
+
+class Simulation(threading.Thread):
+    # Fyzika ve vlastním vlákně. Jádra uvolňují GIL, takže běží souběžně s vykreslováním.
+    # Pozice se po každém kroku zkopírují do zadního ze dvou bufferů a ten se vymění s předním;
+    # vykreslování čte přední buffer bez zámků a bez kopírování (viz acquire_front).
+    # Změny počtu částic, přitahovačů a integrátoru posílá hlavní vlákno frontou příkazů. Příkazy jsou
+    # relativní (přidej, přepni, zdvojnásob) a vlákno fyziky je použije na svůj aktuální stav, takže
+    # dva stisky ve stejném snímku nebo kroku fyziky platí oba.
+    def __init__(self, positions, velocities, masses, attractors):
+        super().__init__(daemon=True)
+        self.positions = positions
+        self.velocities = velocities
+        self.masses = masses
+        self.attractors = attractors
+        self.accelerations = np.zeros_like(velocities)
+        self.quadtree = QuadTree(4 * positions.shape[0] + 1)
+        self.commands = queue.SimpleQueue()
+
+        self.speed_multiplier = 1.0
+        self.nbody_mode = False
+        self.integrator = INTEGRATOR_LEAPFROG
+        self.substeps = 1
+        self.rate = 60
+        self.running = True
+
+        self.buffers = (positions.copy(), positions.copy())
+        self.front = self.buffers[0]
+        self.reading = None
+        self.measured_rate = 0.0
+        self.reset_drift()
+
+    def acquire_front(self):
+        # Přední buffer pro vykreslení; dokud ho čteme, fyzika do něj nezapíše
+        while True:
+            front = self.front
+            self.reading = front
+            if self.front is front:
+                return front
+
+    def release_front(self):
+        self.reading = None
+
+    def publish(self):
+        back = self.buffers[1] if self.front is self.buffers[0] else self.buffers[0]
+        if back is self.reading:
+            # Vykreslování ještě čte starší snímek, zveřejní se až další krok
+            return
+        np.copyto(back, self.positions)
+        self.front = back
+
+    def reset_drift(self):
+        # Nová referenční energie a moment hybnosti, od kterých se měří drift
+        self.drift_start = energy_and_momentum(self.positions, self.velocities, self.masses, self.attractors, G)
+        self.drift_steps = 0
+        self.update_drift()
+
+    def update_drift(self):
+        energy, momentum = energy_and_momentum(self.positions, self.velocities, self.masses, self.attractors, G)
+        energy_drift = (energy - self.drift_start[0]) / abs(self.drift_start[0]) * 100
+        momentum_drift = (momentum - self.drift_start[1]) / abs(self.drift_start[1]) * 100
+        self.drift_text = (f"{INTEGRATOR_NAMES[self.integrator]} x{self.substeps}, {self.drift_steps} kroků: "
+                           f"drift E {energy_drift:+.3f} %, L {momentum_drift:+.3f} %")
+
+    def handle(self, command, *args):
+        if command == "spawn":
+            new_pos, new_vel, new_mass = args
+            self.positions = np.vstack((self.positions, new_pos))
+            self.velocities = np.vstack((self.velocities, new_vel))
+            self.masses = np.hstack((self.masses, new_mass))
+            self.accelerations = np.zeros_like(self.velocities)
+            self.buffers = (self.positions.copy(), self.positions.copy())
+            self.front = self.buffers[0]
+        elif command == "add_attractor":
+            if self.attractors.shape[0] >= MAX_ATTRACTORS:
+                return
+            x, y = args
+            self.attractors = np.vstack((self.attractors, [[x, y, ATTRACTOR_MASS]]))
+        elif command == "remove_attractor_near":
+            if self.attractors.shape[0] <= 1:
+                return
+            x, y = args
+            nearest = np.argmin(np.hypot(self.attractors[:, 0] - x, self.attractors[:, 1] - y))
+            self.attractors = np.delete(self.attractors, nearest, axis=0)
+        elif command == "drag_attractor":
+            # Posune přitahovač pod předchozí polohou myši o její pohyb; drift se změří znovu až po puštění
+            from_x, from_y, to_x, to_y = args
+            k = attractor_at(self.attractors, (from_x, from_y))
+            if k is not None:
+                self.attractors[k, 0] += to_x - from_x
+                self.attractors[k, 1] += to_y - from_y
+            return
+        elif command == "nbody":
+            self.nbody_mode = not self.nbody_mode
+            self.accelerations[:] = 0
+            return
+        elif command in ("toggle_integrator", "substeps"):
+            self.update_drift()
+            print(self.drift_text)
+            if command == "toggle_integrator":
+                self.integrator = 1 - self.integrator
+            else:
+                self.substeps = min(max(int(self.substeps * args[0]), 1), MAX_SUBSTEPS)
+        self.reset_drift()
+
+    def step(self):
+        if self.nbody_mode:
+            self.quadtree.accelerations(self.positions, self.masses, BH_THETA, G, BH_SOFTENING, self.accelerations)
+        apply_gravity_and_update(self.positions, self.velocities, self.accelerations, self.attractors, G,
+                                 self.speed_multiplier, self.substeps, self.integrator)
+        self.drift_steps += 1
+        if self.drift_steps % DRIFT_INTERVAL == 0:
+            self.update_drift()
+
+    def run(self):
+        next_step = time.perf_counter()
+        window_start = next_step
+        window_steps = 0
+        while self.running:
+            while not self.commands.empty():
+                self.handle(*self.commands.get())
+            self.step()
+            self.publish()
+
+            window_steps += 1
+            now = time.perf_counter()
+            if now - window_start >= 0.5:
+                self.measured_rate = window_steps / (now - window_start)
+                window_start = now
+                window_steps = 0
+
+            # Pevná frekvence; když fyzika nestíhá, nedohání se, jen zpomalí
+            next_step = max(next_step + 1.0 / self.rate, now)
+            delay = next_step - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+positions = random_positions(num_particles)
+attractors = np.array([[SUN_X, SUN_Y, SUN_MASS]], dtype=np.float64)
+sim = Simulation(positions, orbit_velocities(positions, attractors), np.ones(num_particles, dtype=np.float32),
+                 attractors)
+render_rate = 60
+dragged = None
+
+font = load_font(None, 24)
+def draw_info(count):
+    np_text = render_text(font, f"Počet částic: {count}", (200, 200, 200))
+    sp_text = render_text(font, f"Rychlost: {sim.speed_multiplier:.1f}x", (200, 200, 200))
+    nb_text = render_text(font, f"Vzájemná gravitace (N): {'zap' if sim.nbody_mode else 'vyp'}",
+                          (200, 200, 200))
+    it_text = render_text(font, f"Integrátor (I, +/-): {sim.drift_text}", (200, 200, 200))
+    at_text = render_text(font, f"Přitahovače (A, Delete, tažení myší): {sim.attractors.shape[0]}",
+                          (200, 200, 200))
+    hz_text = render_text(font, f"Fyzika ([ ]): {sim.measured_rate:.0f}/{sim.rate} Hz   "
+                                f"Vykreslování (, .): {clock.get_fps():.0f}/{render_rate} FPS", (200, 200, 200))
+    screen.blit(hz_text, (20, screen_height - 120))
+    screen.blit(at_text, (20, screen_height - 100))
+    screen.blit(np_text, (20, screen_height - 80))
+    screen.blit(sp_text, (20, screen_height - 60))
+    screen.blit(nb_text, (20, screen_height - 40))
+    screen.blit(it_text, (20, screen_height - 20))
+
+def change_rate(rates, current, direction):
+    index = min(range(len(rates)), key=lambda i: abs(rates[i] - current))
+    return rates[max(0, min(len(rates) - 1, index + direction))]
 
 clock = pygame.time.Clock()
 running = True
+sim.start()
 
 while running:
     screen.fill(BLACK)
@@ -90,42 +277,66 @@ while running:
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 running = False
+            elif event.key == pygame.K_n:
+                sim.commands.put(("nbody",))
+            elif event.key == pygame.K_i:
+                sim.commands.put(("toggle_integrator",))
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                sim.commands.put(("substeps", 2.0))
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                sim.commands.put(("substeps", 0.5))
+            elif event.key == pygame.K_RIGHTBRACKET:
+                sim.rate = change_rate(PHYSICS_RATES, sim.rate, 1)
+            elif event.key == pygame.K_LEFTBRACKET:
+                sim.rate = change_rate(PHYSICS_RATES, sim.rate, -1)
+            elif event.key == pygame.K_PERIOD:
+                render_rate = change_rate(RENDER_RATES, render_rate, 1)
+            elif event.key == pygame.K_COMMA:
+                render_rate = change_rate(RENDER_RATES, render_rate, -1)
+            elif event.key == pygame.K_a:
+                sim.commands.put(("add_attractor", *pygame.mouse.get_pos()))
+            elif event.key in (pygame.K_DELETE, pygame.K_BACKSPACE):
+                sim.commands.put(("remove_attractor_near", *pygame.mouse.get_pos()))
+                dragged = None
         elif event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == 1:
-                speed_multiplier = min(speed_multiplier + 0.2, 10.0)
+                # Při tažení si pamatujeme jen poslední polohu myši, přitahovač hledá a posouvá fyzika
+                dragged = event.pos if attractor_at(sim.attractors, event.pos) is not None else None
+                if dragged is None:
+                    sim.speed_multiplier = min(sim.speed_multiplier + 0.2, 10.0)
             elif event.button == 3:
                 new_count = 100
-                new_pos = np.random.rand(new_count, 2).astype(np.float32)
-                new_pos[:, 0] *= screen_width
-                new_pos[:, 1] *= screen_height
+                new_pos = random_positions(new_count)
                 new_mass = np.ones(new_count, dtype=np.float32)
-                new_vel = np.zeros((new_count, 2), dtype=np.float32)
-                dx = new_pos[:, 0] - SUN_X
-                dy = new_pos[:, 1] - SUN_Y
-                dist = np.sqrt(dx**2 + dy**2)
-                spd = np.sqrt(G * SUN_MASS / (dist + 1e-5))
-                new_vel[:, 0] = -dy / dist * spd
-                new_vel[:, 1] = dx / dist * spd
-                positions = np.vstack((positions, new_pos))
-                masses = np.hstack((masses, new_mass))
-                velocities = np.vstack((velocities, new_vel))
+                new_vel = orbit_velocities(new_pos, sim.attractors)
+                sim.commands.put(("spawn", new_pos, new_vel, new_mass))
             elif event.button == 4:
-                speed_multiplier = min(speed_multiplier + 0.1, 10.0)
+                sim.speed_multiplier = min(sim.speed_multiplier + 0.1, 10.0)
             elif event.button == 5:
-                speed_multiplier = max(speed_multiplier - 0.1, 0.1)
-
-    apply_gravity_and_update(positions, velocities, masses, SUN_X, SUN_Y, SUN_MASS, G, speed_multiplier)
+                sim.speed_multiplier = max(sim.speed_multiplier - 0.1, 0.1)
+        elif event.type == pygame.MOUSEMOTION and dragged is not None:
+            sim.commands.put(("drag_attractor", *dragged, *event.pos))
+            dragged = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and dragged is not None:
+            dragged = None
+            sim.commands.put(("release_attractor",))
 
-    pygame.draw.circle(screen, YELLOW, (int(SUN_X), int(SUN_Y)), 10)
+    attractors = sim.attractors
+    for attractor_x, attractor_y, mass in attractors:
+        pygame.draw.circle(screen, YELLOW, (int(attractor_x), int(attractor_y)), attractor_radius(mass))
 
-    for i in range(positions.shape[0]):
-        dist = np.sqrt((positions[i, 0] - SUN_X) ** 2 + (positions[i, 1] - SUN_Y) ** 2)
-        color = get_color(dist)
-        pygame.draw.circle(screen, color, (int(positions[i, 0]), int(positions[i, 1])), 2)
+    # Všechny částice jedním průchodem přes pole pixelů obrazovky
+    positions = sim.acquire_front()
+    pixels = pygame.surfarray.pixels2d(screen)
+    draw_particles(pixels, positions, attractors, COLOR_BANDS, palette)
+    del pixels
+    sim.release_front()
 
-    draw_info()
+    draw_info(positions.shape[0])
     pygame.display.flip()
-    clock.tick(60)
+    clock.tick(render_rate)
 
+sim.running = False
+sim.join()
 pygame.quit()
 sys.exit()
@@ -1,8 +1,17 @@
 import pygame
-import random
-import math
+import argparse
+import time
+import numpy as np
 from pygame.locals import *
 
+from jadra_o import ParticleLife, draw_swarm, update_swarm
+from texty import load_font, render_text
+
+parser = argparse.ArgumentParser(description="Simulátor částic")
+parser.add_argument("--budget", type=float, default=16.6, metavar="MS",
+                    help="čas na fyziku a kreslení jednoho snímku, který drží regulátor (G)")
+args = parser.parse_args()
+
 # Inicializace
 pygame.init()
 info = pygame.display.Info()
@@ -16,7 +25,7 @@ WHITE = (255, 255, 255)
 RED = (255, 50, 50)
 
 # Nastavení
-MAX_PARTICLES = 20000
+MAX_PARTICLES = 1000000
 MIN_PARTICLES = 100
 DEFAULT_PARTICLES = 5000
 ATTRACTION_RADIUS = 300
@@ -25,51 +34,131 @@ DAMPING = 0.96
 MIN_FORCE = 0.1
 MAX_FORCE = 10
 DEFAULT_FORCE = 2.0
+FORCE_SCALE = 0.2   # Zrychlení u cíle při síle 1
+
+# Částicový život (klávesa L): druhy částic se navzájem přitahují a odpuzují podle matice pravidel (M = nová)
+LIFE_COLORS = [(255, 80, 80), (80, 255, 80), (80, 120, 255), (255, 230, 60), (230, 80, 255), (60, 230, 230)]
+LIFE_RADIUS = 12      # Dosah interakce (px), zároveň velikost buňky mřížky
+LIFE_BETA = 0.3       # Pod tímto zlomkem dosahu se odpuzují všechny druhy
+LIFE_STRENGTH = 0.01  # Zrychlení od jednoho souseda při plné síle pravidla
+
+# Regulátor (klávesa G): ubírá aktivní částice, když snímek trvá déle než rozpočet, a vrací je,
+# až je čas pod GOVERNOR_LOW rozpočtu. Mezi tím pásmo, kde se nic nemění, a po každé změně
+# se GOVERNOR_SETTLE snímků čeká, než se průměr ustálí.
+GOVERNOR_SMOOTHING = 0.2   # Váha nového snímku v klouzavém průměru
+GOVERNOR_LOW = 0.75
+GOVERNOR_SETTLE = 10
+GOVERNOR_MAX_STEP = 1.25   # Za jednu změnu nejvíc o čtvrtinu přidat
+GOVERNOR_MIN_STEP = 0.5    # a nejvíc o polovinu ubrat
+
+rng = np.random.default_rng()
+
+# Posuny barevných složek ve formátu pixelů obrazovky - barvy částic jsou uložené rovnou v něm
+RED_SHIFT, GREEN_SHIFT, BLUE_SHIFT, _ = screen.get_shifts()
+life_palette = np.array([screen.map_rgb(color) for color in LIFE_COLORS], dtype=np.uint32)
+
+# Všechny částice ve sloupcích NumPy polí s rezervou, existuje prvních count řádků a simuluje
+# a kreslí se prvních active z nich (zbytek může regulátor dočasně zmrazit).
+# Přidání a ubrání částic jen posune count, pole se zvětšují geometricky.
+class Swarm:
+    def __init__(self, count):
+        self.count = 0
+        self.active = 0
+        self.allocate(max(count, 1024))
+        self.resize(count)
+
+    def allocate(self, capacity):
+        x = np.empty(capacity, dtype=np.float32)
+        y = np.empty(capacity, dtype=np.float32)
+        vx = np.empty(capacity, dtype=np.float32)
+        vy = np.empty(capacity, dtype=np.float32)
+        color = np.empty(capacity, dtype=np.uint32)
+        species = np.empty(capacity, dtype=np.uint8)
+        if self.count:
+            x[:self.count] = self.x[:self.count]
+            y[:self.count] = self.y[:self.count]
+            vx[:self.count] = self.vx[:self.count]
+            vy[:self.count] = self.vy[:self.count]
+            color[:self.count] = self.color[:self.count]
+            species[:self.count] = self.species[:self.count]
+        self.x, self.y, self.vx, self.vy, self.color, self.species = x, y, vx, vy, color, species
+
+    def spawn(self, start, end):
+        # Nové částice náhodně po obrazovce s malou náhodnou rychlostí
+        count = end - start
+        self.x[start:end] = rng.integers(0, WIDTH, count, endpoint=True)
+        self.y[start:end] = rng.integers(0, HEIGHT, count, endpoint=True)
+        self.vx[start:end] = rng.uniform(-1, 1, count)
+        self.vy[start:end] = rng.uniform(-1, 1, count)
+        rgb = rng.integers(50, 255, (count, 3), endpoint=True, dtype=np.uint32)
+        self.color[start:end] = (rgb[:, 0] << RED_SHIFT) | (rgb[:, 1] << GREEN_SHIFT) | (rgb[:, 2] << BLUE_SHIFT)
+        self.species[start:end] = rng.integers(len(LIFE_COLORS), size=count)
+
+    def resize(self, count):
+        if count > self.x.shape[0]:
+            self.allocate(max(count, 2 * self.x.shape[0]))
+        if count > self.count:
+            self.spawn(self.count, count)
+        self.count = count
+        self.active = min(self.active, count)
+
+    def reset(self):
+        self.spawn(0, self.count)
+
+    def interact(self, life, matrix):
+        # Síly mezi částicemi navzájem, jen přidají rychlost - pohyb dokončí update
+        n = self.active
+        life.kick(self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], self.species[:n], matrix, LIFE_BETA,
+                  LIFE_STRENGTH)
 
-# Třída pro částice
-class Particle:
-    def __init__(self, x=None, y=None):
-        self.x = random.randint(0, WIDTH) if x is None else x
-        self.y = random.randint(0, HEIGHT) if y is None else y
-        self.color = (
-            random.randint(50, 255),
-            random.randint(50, 255),
-            random.randint(50, 255)
-        )
-        self.size = 1
-        self.vx = random.uniform(-1, 1)
-        self.vy = random.uniform(-1, 1)
-    
     def update(self, target_x, target_y, attraction_mode, attraction_force):
-        dx = target_x - self.x
-        dy = target_y - self.y
-        distance = math.sqrt(dx*dx + dy*dy)
-        
-        if distance < ATTRACTION_RADIUS and distance > 5:
-            force = (ATTRACTION_RADIUS - distance) / ATTRACTION_RADIUS
-            
-            if attraction_mode:
-                self.vx += dx/distance * force * attraction_force * 0.2
-                self.vy += dy/distance * force * attraction_force * 0.2
-            else:
-                self.vx -= dx/distance * force * attraction_force * 0.2
-                self.vy -= dy/distance * force * attraction_force * 0.2
-        
-        speed = math.sqrt(self.vx**2 + self.vy**2)
-        if speed > MAX_SPEED:
-            self.vx = (self.vx/speed) * MAX_SPEED
-            self.vy = (self.vy/speed) * MAX_SPEED
-        
-        self.x += self.vx
-        self.y += self.vy
-        self.vx *= DAMPING
-        self.vy *= DAMPING
-        self.x = max(0, min(WIDTH, self.x))
-        self.y = max(0, min(HEIGHT, self.y))
-    
-    def draw(self, surface):
-        if 0 <= int(self.x) < WIDTH and 0 <= int(self.y) < HEIGHT:
-            surface.set_at((int(self.x), int(self.y)), self.color)
+        n = self.active
+        pull = (1 if attraction_mode else -1) * attraction_force * FORCE_SCALE
+        update_swarm(self.x[:n], self.y[:n], self.vx[:n], self.vy[:n], target_x, target_y, pull,
+                     ATTRACTION_RADIUS, MAX_SPEED, DAMPING, WIDTH, HEIGHT)
+
+    def draw(self, surface, palette=None):
+        # Všechny částice jedním průchodem do pixelů, částice mimo okno jádro přeskočí.
+        # S paletou mají barvu podle druhu místo vlastní.
+        n = self.active
+        color = self.color[:n] if palette is None else palette[self.species[:n]]
+        pixels = pygame.surfarray.pixels2d(surface)
+        draw_swarm(pixels, self.x[:n], self.y[:n], color)
+        del pixels
+
+# Regulátor počtu aktivních částic podle času snímku
+class Governor:
+    def __init__(self, budget):
+        self.budget = budget
+        self.enabled = True
+        self.limit = MAX_PARTICLES
+        self.average = 0.0
+        self.settle = 0
+        self.decision = "měří"
+
+    def active(self, count):
+        return min(self.limit, count) if self.enabled else count
+
+    def update(self, frame_ms, count):
+        self.average += GOVERNOR_SMOOTHING * (frame_ms - self.average)
+        if not self.enabled:
+            return
+        if self.settle:
+            self.settle -= 1
+            return
+        active = self.active(count)
+        # Čas roste s počtem částic zhruba lineárně, cílí se na 90 % rozpočtu
+        scale = 0.9 * self.budget / max(self.average, 1e-3)
+        if self.average > self.budget and active > MIN_PARTICLES:
+            self.limit = max(MIN_PARTICLES, int(active * max(scale, GOVERNOR_MIN_STEP)))
+            self.decision = f"ubírá na {self.limit}"
+        elif self.average < GOVERNOR_LOW * self.budget and active < count:
+            self.limit = min(count, int(active * min(scale, GOVERNOR_MAX_STEP)) + 1)
+            self.decision = f"přidává na {self.limit}"
+        else:
+            self.decision = "drží"
+            return
+        self.settle = GOVERNOR_SETTLE
 
 # Třída pro křížek
 class ExitButton:
@@ -90,20 +179,24 @@ class ExitButton:
 exit_button = ExitButton()
 
 # Globální nastavení
-particles = [Particle() for _ in range(DEFAULT_PARTICLES)]
+swarm = Swarm(DEFAULT_PARTICLES)
 attraction_mode = True
 attraction_force = DEFAULT_FORCE
+life = ParticleLife(WIDTH, HEIGHT, LIFE_RADIUS)
+life_mode = False
+
+# Matice pravidel: jak silně druh v řádku táhne k druhu ve sloupci (záporné = odpuzuje)
+def new_life_matrix():
+    return rng.uniform(-1, 1, (len(LIFE_COLORS), len(LIFE_COLORS))).astype(np.float32)
+
+life_matrix = new_life_matrix()
+governor = Governor(args.budget)
 
 # Funkce pro změnu počtu částic
 def adjust_particles(amount):
-    global particles
-    new_count = len(particles) + amount
+    new_count = swarm.count + amount
     new_count = max(MIN_PARTICLES, min(MAX_PARTICLES, new_count))
-    
-    if new_count > len(particles):
-        particles.extend([Particle() for _ in range(new_count - len(particles))])
-    elif new_count < len(particles):
-        particles = particles[:new_count]
+    swarm.resize(new_count)
 
 # Funkce pro změnu síly interakce
 def adjust_force(amount):
@@ -114,6 +207,7 @@ def adjust_force(amount):
 # Hlavní smyčka
 running = True
 clock = pygame.time.Clock()
+font = load_font('Arial', 24)
 
 while running:
     mouse_x, mouse_y = pygame.mouse.get_pos()
@@ -125,45 +219,61 @@ while running:
         elif event.type == KEYDOWN:
             if event.key == K_ESCAPE:
                 running = False
+            elif event.key == K_l:
+                life_mode = not life_mode
+            elif event.key == K_m:
+                life_matrix = new_life_matrix()
+            elif event.key == K_g:
+                governor.enabled = not governor.enabled
         elif event.type == MOUSEBUTTONDOWN:
             if event.button == 1:  # Levé tlačítko
                 if exit_button.check_click((mouse_x, mouse_y)):
                     running = False
                 else:
                     # Reset s aktuálním počtem částic
-                    particles = [Particle() for _ in range(len(particles))]
+                    swarm.reset()
             elif event.button == 3:  # Pravé tlačítko
                 attraction_mode = not attraction_mode
         elif event.type == MOUSEWHEEL:
             if pygame.key.get_mods() & pygame.KMOD_SHIFT:  # Shift + kolečko = změna síly
                 adjust_force(event.y * 0.2)
-            else:  # Pouze kolečko = změna počtu částic
-                adjust_particles(event.y * 50)
+            else:  # Pouze kolečko = změna počtu částic, krok roste s počtem (desetina, nejméně 50)
+                adjust_particles(event.y * max(50, swarm.count // 10))
     
-    # Aktualizace částic
-    for p in particles:
-        p.update(mouse_x, mouse_y, attraction_mode, attraction_force)
+    # Aktualizace částic - čas fyziky a kreslení měří regulátor
+    frame_start = time.perf_counter()
+    swarm.active = governor.active(swarm.count)
+    if life_mode:
+        swarm.interact(life, life_matrix)
+    swarm.update(mouse_x, mouse_y, attraction_mode, attraction_force)
     
     # Vykreslení
     screen.fill(BLACK)
     
     # Částice
-    for p in particles:
-        p.draw(screen)
+    swarm.draw(screen, life_palette if life_mode else None)
     
     # Křížek pro ukončení
     exit_button.draw(screen)
     
     # Zobrazení aktuálních hodnot
-    font = pygame.font.SysFont('Arial', 24)
-    particles_text = font.render(f"Částic: {len(particles)}", True, WHITE)
-    force_text = font.render(f"Síla: {attraction_force:.1f}", True, WHITE)
-    mode_text = font.render(f"Režim: {'Přitahování' if attraction_mode else 'Odpuzování'}", 
-                          True, WHITE if attraction_mode else RED)
+    shown = f"{swarm.active} z {swarm.count}" if swarm.active < swarm.count else f"{swarm.count}"
+    particles_text = render_text(font, f"Částic: {shown}", WHITE)
+    force_text = render_text(font, f"Síla: {attraction_force:.1f}", WHITE)
+    mode_text = render_text(font, f"Režim: {'Přitahování' if attraction_mode else 'Odpuzování'}", 
+                            WHITE if attraction_mode else RED)
+    life_text = render_text(font, f"Život (L): {'zapnutý, M: nová pravidla' if life_mode else 'vypnutý'}", WHITE)
     
     screen.blit(particles_text, (20, 20))
     screen.blit(force_text, (20, 50))
     screen.blit(mode_text, (20, 80))
+    screen.blit(life_text, (20, 110))
+    if governor.enabled:
+        governor_text = f"Regulátor (G): {governor.average:.1f} / {governor.budget:.1f} ms, {governor.decision}"
+    else:
+        governor_text = f"Regulátor (G): vypnutý, {governor.average:.1f} ms"
+    screen.blit(render_text(font, governor_text, WHITE), (20, 140))
+    governor.update((time.perf_counter() - frame_start) * 1000, swarm.count)
     
     pygame.display.flip()
     clock.tick(60)
@@ -1,8 +1,17 @@
 import pygame
+import argparse
 import math
-import random
+import os
+import queue
+import struct
+import threading
+import time
+import numpy as np
 from pygame import gfxdraw
 
+from jadra_soustava import advance_sleepers, find_isolated, merge_touching_bodies
+from texty import load_font, render_text
+
 # Inicializace
 pygame.init()
 WIDTH, HEIGHT = 1000, 800
@@ -26,124 +35,331 @@ G = 1.5               # Gravitační konstanta
 MIN_DISTANCE = 60
 MAX_DISTANCE = 350
 DAMPING = 0.999       # Mírné tlumení
+STABILIZE_AGE = 30    # Prvních 30 snímků se rychlost srovnává na orbitální
+COLLISION_AGE = 60    # Srážky až po stabilizaci
+GRAVITY_SCALE = 0.00005  # Zrychlení od hvězdy je G * STAR_MASS * hmotnost * GRAVITY_SCALE / r^2
 
-class Particle:
-    __slots__ = ['x', 'y', 'vx', 'vy', 'mass', 'radius', 'color', 'fixed', 'age']
-    
-    def __init__(self, x, y, mass):
-        self.x = x
-        self.y = y
-        self.mass = mass
-        self.vx = 0
-        self.vy = 0
-        self.radius = max(1, int(math.log(mass + 1) * 1.3)
-        self.color = random.choice(COLORS)
-        self.fixed = False
-        self.age = 0
-
-    def update(self, particles, star):
-        if self.fixed:
-            return
-
-        self.age += 1
-
-        # Vektor ke hvězdě
-        dx = star.x - self.x
-        dy = star.y - self.y
-        dist_sq = dx*dx + dy*dy
-        dist = math.sqrt(dist_sq) if dist_sq > 0 else 0.1
-
-        # Silná gravitační síla
-        force = G * star.mass * self.mass / dist_sq
-        
-        # Orbitální rychlost (Keplerův zákon)
-        orbital_speed = math.sqrt(G * star.mass / dist)
-        
-        # Automatické nastavení orbitální rychlosti
-        if self.age < 30:  # Prvních 30 snímků - stabilizace
-            tangent_x = -dy/dist
-            tangent_y = dx/dist
-            self.vx = tangent_x * orbital_speed * random.uniform(0.97, 1.03)
-            self.vy = tangent_y * orbital_speed * random.uniform(0.97, 1.03)
-        
-        # Aplikace gravitace
-        self.vx += force * dx/dist * 0.00005
-        self.vy += force * dy/dist * 0.00005
-        
-        # Tlumení
-        self.vx *= DAMPING
-        self.vy *= DAMPING
-
-        # Kolize a shlukování
-        if self.age > 60:  # Až po stabilizaci
-            for p in particles[:]:
-                if p is self or p.fixed or p.age <= 60:
-                    continue
-                    
-                dx = p.x - self.x
-                dy = p.y - self.y
-                dist = math.hypot(dx, dy)
-                min_dist = self.radius + p.radius
-
-                if dist < min_dist:
-                    # Spojení částic
-                    total_mass = self.mass + p.mass
-                    self.x = (self.x*self.mass + p.x*p.mass)/total_mass
-                    self.y = (self.y*self.mass + p.y*p.mass)/total_mass
-                    self.vx = (self.vx*self.mass + p.vx*p.mass)/total_mass
-                    self.vy = (self.vy*self.mass + p.vy*p.mass)/total_mass
-                    self.mass = total_mass
-                    self.radius = max(2, int(math.log(total_mass + 1) * 1.3)
-                    particles.remove(p)
-                    break
-
-        # Pohyb
-        self.x += self.vx
-        self.y += self.vy
-
-    def draw(self, screen):
-        x, y = int(self.x), int(self.y)
-        if 0 <= x < WIDTH and 0 <= y < HEIGHT:
-            if self.radius < 2:
-                screen.set_at((x, y), self.color)
-            else:
-                gfxdraw.filled_circle(screen, x, y, self.radius, self.color)
-                if self.radius > 2:
-                    gfxdraw.aacircle(screen, x, y, self.radius, WHITE)
-
-# Vytvoření hvězdy
-star = Particle(WIDTH/2, HEIGHT/2, STAR_MASS)
-star.color = YELLOW
-star.fixed = True
-star.radius = 20
-
-def create_particles():
-    particles = [star]
-    for _ in range(NUM_PARTICLES):
-        # Rozložení v disku s vyšší hustotou blíže středu
-        r = (MIN_DISTANCE**2 + (MAX_DISTANCE**2 - MIN_DISTANCE**2) * random.random())**0.5
-        angle = random.uniform(0, 2*math.pi)
-        x = star.x + r * math.cos(angle)
-        y = star.y + r * math.sin(angle)
-        
-        mass = random.uniform(0.8, 1.2)
-        p = Particle(x, y, mass)
-        
-        # Přesná orbitální rychlost
-        orbital_speed = math.sqrt(G * STAR_MASS / r)
-        p.vx = -math.sin(angle) * orbital_speed
-        p.vy = math.cos(angle) * orbital_speed
-        
-        particles.append(p)
-    return particles
+# Uspávání osamělých těles - jednou za SLEEP_FRAMES snímků se uspí ta, ke kterým se během
+# dalších SLEEP_FRAMES snímků nic nepřiblíží, a do probuzení letí po keplerovské dráze
+SLEEP_FRAMES = 32
+SLEEP_MARGIN = 4.0    # Rezerva k součtu poloměrů (px)
+
+# Hvězda stojí uprostřed
+STAR_X, STAR_Y = WIDTH / 2, HEIGHT / 2
+STAR_RADIUS = 20
+
+RADIAL_BUCKET = 4     # Šířka pásma vzdálenosti pro pořadí kreslení (px)
+
+# Checkpoint: hlavička (struct) a za ní pole Disk.FIELDS jedno po druhém, každé zarovnané na 8 bajtů.
+# V hlavičce je semínko, počet částic při vzniku disku (pro R), snímek, stav generátoru PCG64
+# a konstanty, na kterých průběh závisí - checkpoint z běhu s jinými konstantami se nenačte.
+CHECKPOINT_FILE = "soustava.chk"
+CHECKPOINT_MAGIC = b"SOUS"
+CHECKPOINT_VERSION = 1
+CHECKPOINT_HEADER = struct.Struct("<4sIqqqqqI4Q2I5d3q")
+CHECKPOINT_ALIGN = 8
+
+class Disk:
+    # Stav všech částic disku v polích NumPy, jeden řádek na částici (hvězda v polích není)
+    FIELDS = ("x", "y", "vx", "vy", "mass", "radius", "color", "age", "asleep", "on_screen",
+              "sleep_x", "sleep_y", "sleep_vx", "sleep_vy", "sleep_chi")
+
+    def __init__(self, count):
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.vx = np.zeros(count)
+        self.vy = np.zeros(count)
+        self.mass = np.ones(count)
+        self.radius = np.ones(count, dtype=np.int32)
+        self.color = np.zeros(count, dtype=np.int32)
+        self.age = np.zeros(count, dtype=np.int32)
+        # Spící tělesa a jejich stav v okamžiku usnutí
+        self.asleep = np.zeros(count, dtype=np.uint8)
+        self.on_screen = np.zeros(count, dtype=np.uint8)   # spí, ale dráha může vést přes obrazovku
+        self.sleep_x = np.zeros(count)
+        self.sleep_y = np.zeros(count)
+        self.sleep_vx = np.zeros(count)
+        self.sleep_vy = np.zeros(count)
+        self.sleep_chi = np.zeros(count)   # univerzální anomálie z minulého snímku
+        self.frame = 0
+        self.sleep_frame = 0
+
+    @property
+    def count(self):
+        return self.x.shape[0]
+
+    def keep(self, mask):
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name)[mask])
+
+def create_disk(rng, count):
+    disk = Disk(count)
+    # Rozložení v disku s vyšší hustotou blíže středu
+    r = np.sqrt(MIN_DISTANCE**2 + (MAX_DISTANCE**2 - MIN_DISTANCE**2) * rng.random(count))
+    angle = rng.uniform(0, 2*math.pi, count)
+    disk.x[:] = STAR_X + r * np.cos(angle)
+    disk.y[:] = STAR_Y + r * np.sin(angle)
+
+    disk.mass[:] = rng.uniform(0.8, 1.2, count)
+    disk.radius[:] = np.maximum(1, (np.log(disk.mass + 1) * 1.3).astype(np.int32))
+    disk.color[:] = rng.integers(len(COLORS), size=count)
+
+    # Přesná orbitální rychlost
+    orbital_speed = np.sqrt(G * STAR_MASS / r)
+    disk.vx[:] = -np.sin(angle) * orbital_speed
+    disk.vy[:] = np.cos(angle) * orbital_speed
+    return disk
+
+def damped_time(frames):
+    # Tlumení jen zpomaluje čas: bez gravitace je posun za n snímků v * (D + D^2 + ... + D^n)
+    return DAMPING * (1 - DAMPING**frames) / (1 - DAMPING)
+
+def step(disk, rng, sleeping=True):
+    # Dvě fáze: nejdřív se všem bdícím částicím spočítá zrychlení z poloh na začátku kroku a všechny
+    # se posunou, pak se v pevném pořadí vyřeší srážky. Výsledek nezávisí na pořadí částic.
+    disk.frame += 1
+    disk.age += 1
+    awake = np.flatnonzero(disk.asleep == 0) if disk.asleep.any() else slice(None)
+    x, y, vx, vy = disk.x[awake], disk.y[awake], disk.vx[awake], disk.vy[awake]
+
+    # Vektor ke hvězdě
+    dx = STAR_X - x
+    dy = STAR_Y - y
+    dist_sq = dx*dx + dy*dy
+    dist = np.where(dist_sq > 0, np.sqrt(dist_sq), 0.1)
+
+    # Silná gravitační síla
+    force = G * STAR_MASS * disk.mass[awake] / dist_sq
+
+    # Automatické nastavení orbitální rychlosti (Keplerův zákon) během stabilizace
+    young = np.flatnonzero(disk.age[awake] < STABILIZE_AGE)
+    if young.size:
+        orbital_speed = np.sqrt(G * STAR_MASS / dist[young])
+        jitter = rng.uniform(0.97, 1.03, (young.size, 2))
+        vx[young] = -dy[young] / dist[young] * orbital_speed * jitter[:, 0]
+        vy[young] = dx[young] / dist[young] * orbital_speed * jitter[:, 1]
+
+    # Aplikace gravitace a tlumení
+    vx += force * dx/dist * GRAVITY_SCALE
+    vy += force * dy/dist * GRAVITY_SCALE
+    vx *= DAMPING
+    vy *= DAMPING
+
+    # Pohyb
+    x += vx
+    y += vy
+    disk.x[awake], disk.y[awake], disk.vx[awake], disk.vy[awake] = x, y, vx, vy
+
+    # Spící tělesa po keplerovské dráze v čase přeškálovaném tlumením. Tlumení v tom čase zesiluje
+    # gravitaci o D^-2n, za okno se bere střední hodnota D^-SLEEP_FRAMES. Ta, která celé okno
+    # zůstanou mimo obrazovku, stačí spočítat až při probuzení.
+    wake = disk.frame % SLEEP_FRAMES == 0
+    if disk.asleep.any():
+        frames = disk.frame - disk.sleep_frame
+        advance_sleepers(disk.asleep if wake else disk.on_screen, disk.sleep_x, disk.sleep_y, disk.sleep_vx,
+                         disk.sleep_vy, disk.sleep_chi,
+                         disk.mass, G * STAR_MASS * GRAVITY_SCALE / DAMPING**SLEEP_FRAMES, STAR_X, STAR_Y,
+                         damped_time(frames), DAMPING**frames, disk.x, disk.y, disk.vx, disk.vy)
+
+    # Kolize a shlukování (jen mezi bdícími)
+    alive = np.empty(disk.count, dtype=np.uint8)
+    merge_touching_bodies(disk.x, disk.y, disk.vx, disk.vy, disk.mass, disk.radius, disk.age, COLLISION_AGE,
+                          disk.asleep, alive)
+    if not alive.all():
+        disk.keep(alive.view(bool))
+
+    if wake:
+        update_sleep(disk, sleeping)
+
+def update_sleep(disk, sleeping):
+    # Všichni se probudí (poloha spících je právě spočtená) a znovu usnou ti, jejichž dráha
+    # se během příštího okna k žádné jiné nepřiblíží na součet dosahů. Dosah je poloměr,
+    # polovina rezervy a odhad odchylky od přímky vlivem gravitace, a/2 * tau^2.
+    disk.asleep[:] = 0
+    disk.on_screen[:] = 0
+    if not sleeping or disk.count == 0 or disk.age.min() < STABILIZE_AGE:
+        return
+    tau = damped_time(SLEEP_FRAMES)
+
+    # Nejmenší vzdálenost přímé dráhy od hvězdy během okna
+    dx = disk.x - STAR_X
+    dy = disk.y - STAR_Y
+    speed_sq = np.maximum(disk.vx**2 + disk.vy**2, 1e-12)
+    t = np.clip(-(dx*disk.vx + dy*disk.vy) / speed_sq, 0.0, tau)
+    closest = np.maximum(np.hypot(dx + disk.vx*t, dy + disk.vy*t), STAR_RADIUS)
+    bend = 0.5 * G * STAR_MASS * GRAVITY_SCALE * disk.mass / closest**2 * tau**2 / DAMPING**(2 * SLEEP_FRAMES)
+    reach = disk.radius + SLEEP_MARGIN / 2 + bend
+
+    isolated = np.empty(disk.count, dtype=np.uint8)
+    find_isolated(disk.x, disk.y, disk.vx, disk.vy, reach, tau, isolated)
+    disk.asleep[:] = isolated
+    disk.on_screen[:] = isolated & ((np.maximum(disk.x, disk.x + disk.vx*tau) + reach >= 0)
+                                    & (np.minimum(disk.x, disk.x + disk.vx*tau) - reach < WIDTH)
+                                    & (np.maximum(disk.y, disk.y + disk.vy*tau) + reach >= 0)
+                                    & (np.minimum(disk.y, disk.y + disk.vy*tau) - reach < HEIGHT))
+    disk.sleep_x[:] = disk.x
+    disk.sleep_y[:] = disk.y
+    disk.sleep_vx[:] = disk.vx
+    disk.sleep_vy[:] = disk.vy
+    disk.sleep_chi[:] = 0.0
+    disk.sleep_frame = disk.frame
+
+def checkpoint_constants():
+    return (G, STAR_MASS, DAMPING, GRAVITY_SCALE, SLEEP_MARGIN), (STABILIZE_AGE, COLLISION_AGE, SLEEP_FRAMES)
+
+def aligned(offset):
+    return -(-offset // CHECKPOINT_ALIGN) * CHECKPOINT_ALIGN
+
+def snapshot(disk, rng, seed, count, sleeping):
+    # Hlavička a kopie polí v jednom okamžiku - zapsat se dají kdykoli později a v jiném vlákně
+    state = rng.bit_generator.state
+    floats, ints = checkpoint_constants()
+    header = CHECKPOINT_HEADER.pack(
+        CHECKPOINT_MAGIC, CHECKPOINT_VERSION, -1 if seed is None else seed, count, disk.count,
+        disk.frame, disk.sleep_frame, int(sleeping),
+        state["state"]["state"] >> 64, state["state"]["state"] & (2**64 - 1),
+        state["state"]["inc"] >> 64, state["state"]["inc"] & (2**64 - 1),
+        state["has_uint32"], state["uinteger"], *floats, *ints)
+    return disk.frame, header, [getattr(disk, name).copy() for name in Disk.FIELDS]
+
+def write_checkpoint(path, snapshot):
+    # Nejdřív do dočasného souboru, po dopsání se přejmenuje - přerušený zápis nepoškodí starý checkpoint
+    _, header, arrays = snapshot
+    with open(path + ".tmp", "wb") as f:
+        f.write(header)
+        offset = len(header)
+        for array in arrays:
+            f.write(bytes(aligned(offset) - offset))
+            offset = aligned(offset)
+            array.tofile(f)
+            offset += array.nbytes
+    os.replace(path + ".tmp", path)
+    return offset
+
+def load_checkpoint(path):
+    # Soubor se namapuje do paměti a pole se z něj jen zkopírují, nic se neparsuje
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    if raw.shape[0] < CHECKPOINT_HEADER.size:
+        raise ValueError(f"{path}: není checkpoint Soustava.py")
+    (magic, version, seed, count, particles, frame, sleep_frame, sleeping, state_hi, state_lo, inc_hi, inc_lo,
+     has_uint32, uinteger, *constants) = CHECKPOINT_HEADER.unpack(raw[:CHECKPOINT_HEADER.size].tobytes())
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+        raise ValueError(f"{path}: není checkpoint Soustava.py verze {CHECKPOINT_VERSION}")
+    floats, ints = checkpoint_constants()
+    if tuple(constants) != floats + ints:
+        raise ValueError(f"{path}: checkpoint je z běhu s jinými konstantami")
+
+    disk = Disk(particles)
+    offset = CHECKPOINT_HEADER.size
+    for name in Disk.FIELDS:
+        offset = aligned(offset)
+        dtype = getattr(disk, name).dtype
+        end = offset + particles * dtype.itemsize
+        if end > raw.shape[0]:
+            raise ValueError(f"{path}: checkpoint je useknutý")
+        setattr(disk, name, raw[offset:end].view(dtype).copy())
+        offset = end
+    del raw
+    disk.frame = frame
+    disk.sleep_frame = sleep_frame
+
+    rng = np.random.default_rng()
+    rng.bit_generator.state = {"bit_generator": "PCG64",
+                               "state": {"state": state_hi << 64 | state_lo, "inc": inc_hi << 64 | inc_lo},
+                               "has_uint32": has_uint32, "uinteger": uinteger}
+    return disk, rng, None if seed < 0 else seed, count, bool(sleeping)
+
+class CheckpointWriter(threading.Thread):
+    # Zápis checkpointů ve vlastním vlákně, hlavní smyčka jen předá snímek stavu a kreslí dál.
+    # Čeká-li už jeden snímek na zápis, další se zahodí, aby se pomalým diskem nehromadila paměť.
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.snapshots = queue.Queue(maxsize=1)
+        self.status = ""
+
+    def save(self, snapshot):
+        try:
+            self.snapshots.put_nowait(snapshot)
+        except queue.Full:
+            self.status = f"checkpoint snímku {snapshot[0]} přeskočen, předchozí se ještě zapisuje"
+
+    def run(self):
+        while True:
+            snapshot = self.snapshots.get()
+            if snapshot is None:
+                return
+            start = time.perf_counter()
+            try:
+                size = write_checkpoint(self.path, snapshot)
+            except OSError as error:
+                self.status = f"checkpoint se nepodařilo uložit: {error}"
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            self.status = f"snímek {snapshot[0]} uložen do {self.path} ({size / 1e6:.1f} MB, {elapsed:.0f} ms)"
+
+    def close(self):
+        # Dopsat, co je ve frontě, a skončit
+        self.snapshots.put(None)
+        self.join()
+
+def draw_star(screen):
+    gfxdraw.filled_circle(screen, int(STAR_X), int(STAR_Y), STAR_RADIUS, YELLOW)
+    gfxdraw.aacircle(screen, int(STAR_X), int(STAR_Y), STAR_RADIUS, WHITE)
+
+# Předkreslené částice podle (poloměr, barva), každá se vyrenderuje jen jednou
+sprites = {}
+# Barvy prachu (částic o poloměru 1) ve formátu pixelů obrazovky
+dust_palette = np.array([screen.map_rgb(color) for color in COLORS], dtype=np.uint32)
+
+def sprite(radius, color):
+    key = (radius, color)
+    if key not in sprites:
+        size = 2 * radius + 1
+        surface = pygame.Surface((size, size), pygame.SRCALPHA)
+        gfxdraw.filled_circle(surface, radius, radius, radius, COLORS[color])
+        if radius > 2:
+            gfxdraw.aacircle(surface, radius, radius, radius, WHITE)
+        sprites[key] = surface.convert_alpha()
+    return sprites[key]
+
+def draw_disk(screen, disk):
+    # Viditelné částice od nejvzdálenějšího pásma po nejbližší ke hvězdě. Pásma jsou malá
+    # celá čísla, takže stabilní řazení je radix sort v O(n) a uvnitř pásma zůstává pořadí polí.
+    x = disk.x.astype(int)
+    y = disk.y.astype(int)
+    visible = np.flatnonzero((x >= 0) & (x < WIDTH) & (y >= 0) & (y < HEIGHT))
+    dist = np.hypot(disk.x[visible] - STAR_X, disk.y[visible] - STAR_Y)
+    bucket = np.minimum(dist // RADIAL_BUCKET, 65535).astype(np.uint16)
+    order = visible[np.argsort(65535 - bucket, kind="stable")]
+
+    # Prach jedním zápisem do pixelů, větší tělesa předkreslenými kruhy v jednom volání blits
+    dust = order[disk.radius[order] < 2]
+    pixels = pygame.surfarray.pixels2d(screen)
+    pixels[x[dust], y[dust]] = dust_palette[disk.color[dust]]
+    del pixels
+    bodies = order[disk.radius[order] >= 2]
+    screen.blits([(sprite(radius, color), (px - radius, py - radius))
+                  for px, py, radius, color in zip(x[bodies].tolist(), y[bodies].tolist(),
+                                                   disk.radius[bodies].tolist(), disk.color[bodies].tolist())],
+                 doreturn=False)
 
 # Hlavní smyčka
-def main():
-    particles = create_particles()
+def main(count=NUM_PARTICLES, seed=None, checkpoint=CHECKPOINT_FILE, checkpoint_every=0, resume=False):
+    # Jeden generátor pro vznik disku i pro stabilizaci - se stejným semínkem proběhne simulace stejně.
+    # Checkpoint nese i stav generátoru, takže po načtení běh pokračuje přesně tak, jak by šel dál.
+    sleeping = True
+    if resume:
+        disk, rng, seed, count, sleeping = load_checkpoint(checkpoint)
+    else:
+        rng = np.random.default_rng(seed)
+        disk = create_disk(rng, count)
+    writer = CheckpointWriter(checkpoint)
+    writer.start()
     clock = pygame.time.Clock()
     running = True
     paused = False
-    font = pygame.font.SysFont('Arial', 16)
+    font = load_font('Arial', 16)
     
     while running:
         for event in pygame.event.get():
@@ -153,31 +369,53 @@ def main():
                 if event.key == pygame.K_SPACE:
                     paused = not paused
                 elif event.key == pygame.K_r:
-                    particles = create_particles()
+                    disk = create_disk(rng, count)
+                elif event.key == pygame.K_s:
+                    sleeping = not sleeping
+                elif event.key == pygame.K_k:
+                    writer.save(snapshot(disk, rng, seed, count, sleeping))
+                elif event.key == pygame.K_l:
+                    try:
+                        disk, rng, seed, count, sleeping = load_checkpoint(checkpoint)
+                        writer.status = f"načten snímek {disk.frame} z {checkpoint}"
+                    except (OSError, ValueError) as error:
+                        writer.status = f"checkpoint se nepodařilo načíst: {error}"
         
         if not paused:
-            # Aktualizace v náhodném pořadí
-            for p in random.sample(particles, len(particles)):
-                p.update(particles, star)
+            step(disk, rng, sleeping)
+            if checkpoint_every and disk.frame % checkpoint_every == 0:
+                writer.save(snapshot(disk, rng, seed, count, sleeping))
         
         # Vykreslení
         screen.fill(BLACK)
         
         # Nejprve hvězda
-        star.draw(screen)
+        draw_star(screen)
         
         # Pak částice seřazené podle vzdálenosti
-        for p in sorted(particles, key=lambda p: -((p.x-star.x)**2 + (p.y-star.y)**2)):
-            if not p.fixed:
-                p.draw(screen)
+        draw_disk(screen, disk)
         
         # Informace
-        info = f"Částic: {len(particles)-1} | SPACE: pauza | R: reset"
-        screen.blit(font.render(info, True, WHITE), (10, 10))
+        asleep = int(np.count_nonzero(disk.asleep))
+        info = (f"Částic: {disk.count} (spí {asleep}) | SPACE: pauza | R: reset | "
+                f"S: uspávání {'zapnuto' if sleeping else 'vypnuto'} | K: uložit | L: načíst")
+        screen.blit(render_text(font, info, WHITE), (10, 10))
+        if writer.status:
+            screen.blit(render_text(font, writer.status, WHITE), (10, 30))
         
         pygame.display.flip()
         clock.tick(60)
 
+    writer.close()
+
 if __name__ == "__main__":
-    main()
-    pygame.quit()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Simulace sluneční soustavy")
+    parser.add_argument("--particles", type=int, default=NUM_PARTICLES)
+    parser.add_argument("--seed", type=int, help="semínko generátoru, stejné semínko = stejný průběh")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="soubor pro uložení a načtení stavu (K, L)")
+    parser.add_argument("--checkpoint-every", type=int, default=0, metavar="N",
+                        help="ukládat checkpoint automaticky každých N snímků")
+    parser.add_argument("--resume", action="store_true", help="začít ze souboru --checkpoint")
+    args = parser.parse_args()
+    main(args.particles, args.seed, args.checkpoint, args.checkpoint_every, args.resume)
+    pygame.quit()
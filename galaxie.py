@@ -0,0 +1,26 @@
+# galaxie.py
+# Barvy, pásma a rozlišení záznamu společné pro Galai.py a galaxie_render.py.
+# Nenačítá pygame ani numba jádra, takže je procesy vykreslování importují levně.
+
+import numpy as np
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+# Rozlišení pro záznam bez okna
+RECORD_WIDTH, RECORD_HEIGHT = 1920, 1080
+
+def get_color(distance):
+    if distance < 100:
+        return (255, 255, 255)  # bílá
+    elif distance < 200:
+        return (255, 255, 0)    # žlutá
+    elif distance < 300:
+        return (255, 165, 0)    # oranžová
+    elif distance < 400:
+        return (255, 0, 0)      # červená
+    else:
+        return (128, 0, 255)    # fialová
+
+# Hranice barevných pásem podle vzdálenosti od černé díry (viz get_color)
+COLOR_BANDS = np.array([100, 200, 300, 400], dtype=np.float32)
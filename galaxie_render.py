@@ -0,0 +1,76 @@
+# galaxie_render.py
+# Vykreslí trajektorie nahrané přes Galai.py --record do sekvence PNG.
+# Každý proces si soubor namapuje do paměti sám a čte snímky bez kopírování,
+# snímky jsou na sobě nezávislé, takže se práce dělí mezi procesy rovnoměrně.
+#   python galaxie_render.py galaxie.npy snimky --processes 8
+
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pygame
+
+# Jen konstanty, bez numba jader - procesy je importují levně
+from galaxie import BLACK, COLOR_BANDS, RECORD_HEIGHT, RECORD_WIDTH, WHITE, get_color
+
+PALETTE = np.array([get_color(d) for d in [0] + list(COLOR_BANDS)], dtype=np.uint8)
+
+trajectory = None
+
+def open_trajectory(path):
+    # Inicializace procesu - jen namapovat soubor, data se čtou až při kreslení
+    global trajectory
+    trajectory = np.load(path, mmap_mode="r")
+
+def render_frame(job):
+    frame, out_dir = job
+    width, height = RECORD_WIDTH, RECORD_HEIGHT
+    sun_x, sun_y = width / 2, height / 2
+    positions = trajectory[frame]
+    x = positions[:, 0]
+    y = positions[:, 1]
+    valid = np.isfinite(x) & np.isfinite(y)
+    x = x[valid]
+    y = y[valid]
+
+    dist = np.sqrt((x - sun_x) ** 2 + (y - sun_y) ** 2)
+    colors = PALETTE[np.searchsorted(COLOR_BANDS, dist, side="right")]
+    px = x.astype(np.int64)
+    py = y.astype(np.int64)
+
+    # 2x2 tečky jako v okně
+    image = np.zeros((width, height, 3), dtype=np.uint8)
+    for ox in (-1, 0):
+        for oy in (-1, 0):
+            sx = px + ox
+            sy = py + oy
+            inside = (sx >= 0) & (sx < width) & (sy >= 0) & (sy < height)
+            image[sx[inside], sy[inside]] = colors[inside]
+
+    surface = pygame.surfarray.make_surface(image)
+    pygame.draw.circle(surface, WHITE, (int(sun_x), int(sun_y)), 6)
+    pygame.draw.circle(surface, BLACK, (int(sun_x), int(sun_y)), 4)
+    pygame.image.save(surface, os.path.join(out_dir, f"snimek_{frame:05d}.png"))
+    return frame
+
+def render(path, out_dir, processes):
+    os.makedirs(out_dir, exist_ok=True)
+    frames = np.load(path, mmap_mode="r").shape[0]
+    jobs = [(frame, out_dir) for frame in range(frames)]
+
+    start = time.perf_counter()
+    with Pool(processes, initializer=open_trajectory, initargs=(path,)) as pool:
+        for done, _ in enumerate(pool.imap_unordered(render_frame, jobs, chunksize=4), 1):
+            if done % 50 == 0 or done == frames:
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{frames} snímků, {done / elapsed:.1f} snímků/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vykreslení nahrané galaxie do PNG")
+    parser.add_argument("trajectory", help=".npy z Galai.py --record")
+    parser.add_argument("out_dir", help="adresář pro snimek_00000.png, ...")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    render(args.trajectory, args.out_dir, args.processes)
@@ -2,6 +2,11 @@ import pygame
 import sys
 import random
 import math
+import argparse
+from collections import deque
+from itertools import islice
+
+from texty import load_font, render_text
 
 pygame.init()
 pygame.mixer.init()  # Initialize sound mixer
@@ -50,6 +55,7 @@ GOAL_WIDTH = TABLE_HEIGHT // 3
 GOAL_DEPTH = TABLE_WIDTH // 20
 PUCK_SPEED_LIMIT = TABLE_WIDTH // 40
 PADDLE_SPEED = TABLE_WIDTH // 200
+TRAIL_LENGTH = 10  # Puck trail segments, a few hundred still draw fast
 
 # Load sounds
 try:
@@ -76,8 +82,8 @@ class Paddle:
         self.highlight_time = 0
 
     def draw(self):
-        # Draw outer circle
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
+        # Draw outer circle, its rect covers the whole paddle
+        rect = pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
         
         # Draw inner circle with highlight effect if needed
         inner_color = WHITE
@@ -93,6 +99,7 @@ class Paddle:
         
         # Draw center dot
         pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius // 3)
+        return rect
 
     def move_to_target(self):
         dx = self.target_x - self.x
@@ -112,11 +119,20 @@ class Paddle:
             self.highlight = False
 
 class Puck:
-    def __init__(self):
-        self.reset()
+    def __init__(self, trail_length=TRAIL_LENGTH):
         self.radius = PUCK_RADIUS
-        self.trail = []  # For storing previous positions
-        self.max_trail = 10  # Number of trail segments
+        self.max_trail = trail_length  # Number of trail segments
+        self.trail = deque(maxlen=trail_length)  # Ring buffer of previous positions, oldest first
+        
+        # One faded sprite per trail index, rendered once: (sprite, offset from its center)
+        self.trail_sprites = []
+        for i in range(trail_length):
+            alpha = int(255 * (i / trail_length))
+            radius = int(self.radius * (0.3 + 0.7 * (i / trail_length)))
+            sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, (255, 100, 100, alpha), (radius, radius), radius)
+            self.trail_sprites.append((sprite.convert_alpha(), radius))
+        self.reset()
 
     def reset(self):
         self.x = TABLE_X + TABLE_WIDTH // 2
@@ -125,13 +141,11 @@ class Puck:
         speed = PUCK_SPEED_LIMIT * 0.6
         self.dx = math.cos(angle) * speed
         self.dy = math.sin(angle) * speed
-        self.trail = []  # Clear trail on reset
+        self.trail.clear()  # Clear trail on reset
 
     def move(self):
-        # Add current position to trail
+        # Add current position to trail, the oldest one drops out when full
         self.trail.append((self.x, self.y))
-        if len(self.trail) > self.max_trail:
-            self.trail.pop(0)
             
         self.x += self.dx
         self.y += self.dy
@@ -146,30 +160,29 @@ class Puck:
             self.dy *= scale
 
     def draw(self):
-        # Draw trail
-        for i, (tx, ty) in enumerate(self.trail):
-            alpha = int(255 * (i / len(self.trail)))
-            radius = int(self.radius * (0.3 + 0.7 * (i / len(self.trail))))
-            trail_surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-            pygame.draw.circle(trail_surface, (255, 100, 100, alpha), (radius, radius), radius)
-            screen.blit(trail_surface, (tx - radius, ty - radius))
+        # Draw trail, the newest position gets the last (brightest) sprite
+        rect = pygame.Rect(int(self.x), int(self.y), 0, 0)
+        sprites = islice(self.trail_sprites, self.max_trail - len(self.trail), None)
+        rect.unionall_ip(screen.blits((sprite, (tx - radius, ty - radius))
+                                      for (sprite, radius), (tx, ty) in zip(sprites, self.trail)))
         
         # Draw puck
-        pygame.draw.circle(screen, BLACK, (int(self.x), int(self.y)), self.radius)
+        rect.union_ip(pygame.draw.circle(screen, BLACK, (int(self.x), int(self.y)), self.radius))
         pygame.draw.circle(screen, RED, (int(self.x), int(self.y)), self.radius - 5)
         pygame.draw.circle(screen, WHITE, (int(self.x), int(self.y)), self.radius // 3)
+        return rect
 
 class AirHockeyGame:
-    def __init__(self):
+    def __init__(self, trail_length=TRAIL_LENGTH):
         self.player = Paddle(TABLE_X + TABLE_WIDTH // 4, TABLE_Y + TABLE_HEIGHT // 2, BLUE)
         self.ai = Paddle(TABLE_X + 3 * TABLE_WIDTH // 4, TABLE_Y + TABLE_HEIGHT // 2, RED, is_ai=True)
-        self.puck = Puck()
+        self.puck = Puck(trail_length)
         self.player_score = 0
         self.ai_score = 0
         self.game_state = "playing"  # "playing", "game_over"
         self.winner = None
-        self.font = pygame.font.SysFont('Arial', TABLE_HEIGHT // 10, bold=True)
-        self.small_font = pygame.font.SysFont('Arial', TABLE_HEIGHT // 20)
+        self.font = load_font('Arial', TABLE_HEIGHT // 10, bold=True)
+        self.small_font = load_font('Arial', TABLE_HEIGHT // 20)
         self.center_line_width = max(2, TABLE_WIDTH // 300)
         self.border_width = max(5, TABLE_HEIGHT // 50)
         self.goal_color = (100, 100, 100)
@@ -180,6 +193,18 @@ class AirHockeyGame:
         self.countdown = 0  # Countdown timer after goal
         self.goal_scored = False
 
+        # The table never changes, so it is drawn once and copied back wherever something moved.
+        # Only the rects drawn this frame and last frame are sent to the display.
+        self.table_layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.draw_table(self.table_layer)
+        self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        self.overlay.fill((0, 0, 0, 180))
+        self.dirty = []            # Rects drawn over the table last frame
+        self.shown_scores = None   # Scores currently on screen and where they are
+        self.score_rects = []
+        self.full_redraw = True
+        self.overlay_shown = False
+
     def handle_collisions(self):
         current_time = pygame.time.get_ticks()
         
@@ -266,53 +291,79 @@ class AirHockeyGame:
             
         self.ai.move_to_target()
 
-    def draw(self):
+    def draw_table(self, surface):
         # Draw background
-        screen.fill(GRAY)
+        surface.fill(GRAY)
         
         # Draw table
-        pygame.draw.rect(screen, BLACK, self.table_rect, border_radius=10)
-        pygame.draw.rect(screen, WHITE, self.inner_rect, border_radius=5)
+        pygame.draw.rect(surface, BLACK, self.table_rect, border_radius=10)
+        pygame.draw.rect(surface, WHITE, self.inner_rect, border_radius=5)
         
         # Draw center line and circle
-        pygame.draw.line(screen, BLACK,
+        pygame.draw.line(surface, BLACK,
                        (TABLE_X + TABLE_WIDTH // 2, TABLE_Y),
                        (TABLE_X + TABLE_WIDTH // 2, TABLE_Y + TABLE_HEIGHT),
                        self.center_line_width)
-        pygame.draw.circle(screen, BLACK,
+        pygame.draw.circle(surface, BLACK,
                           (TABLE_X + TABLE_WIDTH // 2, TABLE_Y + TABLE_HEIGHT // 2),
                           TABLE_HEIGHT // 6, self.center_line_width)
         
         # Draw goals
-        pygame.draw.rect(screen, self.goal_color,
+        pygame.draw.rect(surface, self.goal_color,
                        (TABLE_X - GOAL_DEPTH, TABLE_Y + TABLE_HEIGHT // 2 - GOAL_WIDTH // 2,
                         GOAL_DEPTH, GOAL_WIDTH), border_radius=5)
-        pygame.draw.rect(screen, self.goal_color,
+        pygame.draw.rect(surface, self.goal_color,
                        (TABLE_X + TABLE_WIDTH, TABLE_Y + TABLE_HEIGHT // 2 - GOAL_WIDTH // 2,
                         GOAL_DEPTH, GOAL_WIDTH), border_radius=5)
         
-        # Draw scores with colored backgrounds
+        # Draw colored score backgrounds
         player_score_bg = pygame.Surface((TABLE_WIDTH//6, TABLE_HEIGHT//10), pygame.SRCALPHA)
         player_score_bg.fill((*BLUE, 150))
-        screen.blit(player_score_bg, (TABLE_X + TABLE_WIDTH//4 - TABLE_WIDTH//12, TABLE_Y + 10))
+        surface.blit(player_score_bg, (TABLE_X + TABLE_WIDTH//4 - TABLE_WIDTH//12, TABLE_Y + 10))
         
         ai_score_bg = pygame.Surface((TABLE_WIDTH//6, TABLE_HEIGHT//10), pygame.SRCALPHA)
         ai_score_bg.fill((*RED, 150))
-        screen.blit(ai_score_bg, (TABLE_X + 3*TABLE_WIDTH//4 - TABLE_WIDTH//12, TABLE_Y + 10))
-        
-        player_text = self.font.render(str(self.player_score), True, WHITE)
-        ai_text = self.font.render(str(self.ai_score), True, WHITE)
-        screen.blit(player_text, (TABLE_X + TABLE_WIDTH // 4 - player_text.get_width() // 2, TABLE_Y + 10))
-        screen.blit(ai_text, (TABLE_X + 3 * TABLE_WIDTH // 4 - ai_text.get_width() // 2, TABLE_Y + 10))
+        surface.blit(ai_score_bg, (TABLE_X + 3*TABLE_WIDTH//4 - TABLE_WIDTH//12, TABLE_Y + 10))
         
         # Draw controls info
-        exit_text = self.small_font.render("ESC - Quit", True, BLACK)
-        screen.blit(exit_text, (SCREEN_WIDTH - exit_text.get_width() - 20, 20))
+        exit_text = render_text(self.small_font, "ESC - Quit", BLACK)
+        surface.blit(exit_text, (SCREEN_WIDTH - exit_text.get_width() - 20, 20))
+
+    def draw(self):
+        # Returns the rects that changed, or None when the whole screen has to be presented
+        if self.overlay_shown:
+            return []
+        if self.full_redraw:
+            screen.blit(self.table_layer, (0, 0))
+        else:
+            # Put the table back under everything drawn last frame
+            for rect in self.dirty:
+                screen.blit(self.table_layer, rect, rect)
+        erased = self.dirty
+        self.dirty = []
+        
+        # Redraw scores on a clean table every frame (blended text must not pile up on itself
+        # and the table copied back may cut into them), but present them only when they change
+        scores = (self.player_score, self.ai_score)
+        changed = scores != self.shown_scores
+        for rect in self.score_rects:
+            screen.blit(self.table_layer, rect, rect)
+        if changed:
+            erased = erased + self.score_rects
+        player_text = render_text(self.font, str(self.player_score), WHITE)
+        ai_text = render_text(self.font, str(self.ai_score), WHITE)
+        self.score_rects = [
+            screen.blit(player_text, (TABLE_X + TABLE_WIDTH // 4 - player_text.get_width() // 2, TABLE_Y + 10)),
+            screen.blit(ai_text, (TABLE_X + 3 * TABLE_WIDTH // 4 - ai_text.get_width() // 2, TABLE_Y + 10)),
+        ]
+        if changed:
+            self.shown_scores = scores
+            erased = erased + self.score_rects
         
         # Draw game elements
-        self.player.draw()
-        self.ai.draw()
-        self.puck.draw()
+        self.dirty.append(self.player.draw())
+        self.dirty.append(self.ai.draw())
+        self.dirty.append(self.puck.draw())
         
         # Update paddle highlights
         self.player.update_highlight()
@@ -321,24 +372,29 @@ class AirHockeyGame:
         # Draw countdown after goal
         if self.goal_scored and pygame.time.get_ticks() < self.countdown:
             time_left = (self.countdown - pygame.time.get_ticks()) / 1000
-            countdown_text = self.font.render(str(int(time_left + 1)), True, BLACK)
-            screen.blit(countdown_text, (SCREEN_WIDTH//2 - countdown_text.get_width()//2, 
-                                      SCREEN_HEIGHT//2 - countdown_text.get_height()//2))
+            countdown_text = render_text(self.font, str(int(time_left + 1)), BLACK)
+            self.dirty.append(screen.blit(countdown_text, (SCREEN_WIDTH//2 - countdown_text.get_width()//2, 
+                                                         SCREEN_HEIGHT//2 - countdown_text.get_height()//2)))
         
-        # Draw game over screen
+        # Draw game over screen once, it stays until restart
         if self.game_state == "game_over":
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            screen.blit(overlay, (0, 0))
+            screen.blit(self.overlay, (0, 0))
             
-            winner_text = self.font.render(f"{'Player' if self.winner == 'player' else 'AI'} Wins!", True, 
-                                        BLUE if self.winner == "player" else RED)
-            restart_text = self.small_font.render("Press R to restart or ESC to quit", True, WHITE)
+            winner_text = render_text(self.font, f"{'Player' if self.winner == 'player' else 'AI'} Wins!", 
+                                      BLUE if self.winner == "player" else RED)
+            restart_text = render_text(self.small_font, "Press R to restart or ESC to quit", WHITE)
             
             screen.blit(winner_text, (SCREEN_WIDTH//2 - winner_text.get_width()//2, 
                                    SCREEN_HEIGHT//2 - winner_text.get_height()))
             screen.blit(restart_text, (SCREEN_WIDTH//2 - restart_text.get_width()//2, 
                                      SCREEN_HEIGHT//2 + 50))
+            self.overlay_shown = True
+            return None
+        
+        if self.full_redraw:
+            self.full_redraw = False
+            return None
+        return erased + self.dirty
 
     def reset_game(self):
         self.player_score = 0
@@ -351,6 +407,8 @@ class AirHockeyGame:
         self.ai.y = TABLE_Y + TABLE_HEIGHT // 2
         self.puck.reset()
         self.goal_scored = False
+        self.full_redraw = True
+        self.overlay_shown = False
 
     def run(self):
         clock = pygame.time.Clock()
@@ -386,10 +444,16 @@ class AirHockeyGame:
                         self.puck.reset()
                         self.goal_scored = False
             
-            self.draw()
-            pygame.display.flip()
+            dirty = self.draw()
+            if dirty is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty)
             clock.tick(FPS)
 
 if __name__ == "__main__":
-    game = AirHockeyGame()
+    parser = argparse.ArgumentParser(description="Air Hockey")
+    parser.add_argument("--trail", type=int, default=TRAIL_LENGTH, help="puck trail segments")
+    args = parser.parse_args()
+    game = AirHockeyGame(max(1, args.trail))
     game.run()
\ No newline at end of file
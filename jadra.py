@@ -0,0 +1,46 @@
+# jadra.py
+# Společný základ numba jader. Jádra každé ukázky jsou ve vlastním modulu (jadra_gravitace.py pro Gravitace.py,
+# jadra_galaxie.py pro Galai.py, jadra_slunko.py, jadra_soustava.py a jadra_o.py), takže ukázka při importu
+# přeloží jen svá jádra. Jádra mají pevné signatury a cache na disku, takže se přeloží při importu
+# (před otevřením okna) a při dalším spuštění jen načtou.
+# Jádra uvolňují GIL (nogil), aby mohla běžet ve vlákně fyziky souběžně s vykreslováním.
+# Bez numba má každý modul zálohy se stejnými rozhraními, v NumPy nebo v Pythonu.
+#   python jadra.py   změří studený a teplý start jader každé ukázky
+
+import os
+import subprocess
+import sys
+import tempfile
+
+try:
+    import numba
+except ImportError:
+    numba = None
+NUMBA = numba is not None
+
+# Moduly s jádry jednotlivých ukázek
+MODULES = ("jadra_gravitace", "jadra_galaxie", "jadra_slunko", "jadra_soustava", "jadra_o")
+
+# Klíč buňky pro slučování v slunko.py a Soustava.py: (planeta,) sloupec a řádek buňky po 21 bitech
+CELL_BITS = 21
+CELL_OFFSET = 1 << (CELL_BITS - 1)
+
+def kernel_report(kernels, startup_time):
+    if not NUMBA:
+        return f"Jádra: záloha bez numba ({startup_time:.2f} s)"
+    warm = all(kernel.stats.cache_hits for kernel in kernels)
+    return f"Jádra: {startup_time:.2f} s ({'teplý start z cache' if warm else 'studený start, překlad'})"
+
+def measure_startup():
+    # Dvakrát importuje jádra každé ukázky v novém procesu s prázdnou cache - poprvé studený, podruhé teplý start
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in MODULES:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+            for _ in range(2):
+                result = subprocess.run([sys.executable, "-c", f"import {module}; print({module}.startup_report())"],
+                                        cwd=here, env=env, capture_output=True, text=True, check=True)
+                print(f"{module:16} {result.stdout.strip()}")
+
+if __name__ == "__main__":
+    measure_startup()
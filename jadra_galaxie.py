@@ -0,0 +1,373 @@
+# jadra_galaxie.py
+# Numba jádra pro Galai.py.
+# Krok kolem černé díry s pohlcováním a zhuštěním polí, záře z histogramu hustoty (DensityMap)
+# a vlastní gravitace disku metodou particle-mesh (ParticleMesh).
+
+import time
+
+import numpy as np
+
+from jadra import NUMBA, kernel_report
+
+if NUMBA:
+    from numba import get_num_threads, njit, prange
+
+start_time = time.perf_counter()
+
+DENSITY_STRIPS = 8    # svislých pruhů záře na vlákno
+
+# NumPy 2 umí u FFT zapisovat do připraveného pole (out=), starší verze si výsledek alokují
+FFT_OUT = np.lib.NumpyVersion(np.__version__) >= "2.0.0"
+
+if NUMBA:
+    @njit("int64(float32[:, ::1], float32[:, ::1], float32[::1], uint8[::1], float64, float64, float64, float64, "
+          "float64, float64, float64)", parallel=True, cache=True, nogil=True)
+    def apply_galaxy_gravity_and_update(positions, velocities, masses, alive, sun_x, sun_y, sun_mass, g,
+                                        speed_multiplier, horizon, swirl):
+        # Krok pro Galai.py - černá díra s vířením, vrací počet pohlcených částic
+        swallowed = 0
+        for i in prange(positions.shape[0]):
+            dx = sun_x - positions[i, 0]
+            dy = sun_y - positions[i, 1]
+            dist_sq = dx*dx + dy*dy
+            dist = np.sqrt(dist_sq)
+            if dist < horizon:
+                alive[i] = 0
+                swallowed += 1
+                continue
+            alive[i] = 1
+            force = g * masses[i] * sun_mass / dist_sq
+            ax = force * dx / dist / masses[i]
+            ay = force * dy / dist / masses[i]
+
+            # Víření - slabé zakřivení pohybu (s vlastní gravitací disku vypnuté)
+            ax += swirl * -dy / (dist + 1e-5)
+            ay += swirl * dx / (dist + 1e-5)
+
+            velocities[i, 0] += ax
+            velocities[i, 1] += ay
+
+            positions[i, 0] += velocities[i, 0] * speed_multiplier
+            positions[i, 1] += velocities[i, 1] * speed_multiplier
+        return swallowed
+
+    @njit("int64(float32[:, ::1], float32[:, ::1], float32[::1], uint8[::1], int64[::1], int64)",
+          cache=True, nogil=True)
+    def compact_particles(positions, velocities, masses, alive, ids, count):
+        # Pohlcené částice nahradí poslední aktivní (i s jejím číslem v ids), vrátí nový počet
+        i = 0
+        while i < count:
+            if alive[i]:
+                i += 1
+                continue
+            count -= 1
+            positions[i, 0] = positions[count, 0]
+            positions[i, 1] = positions[count, 1]
+            velocities[i, 0] = velocities[count, 0]
+            velocities[i, 1] = velocities[count, 1]
+            masses[i] = masses[count]
+            ids[i] = ids[count]
+            alive[i] = alive[count]
+        return count
+
+    @njit("int64(float32[:, ::1], uint32[:, ::1], int64[:, ::1], int64[::1], int32[::1])",
+          parallel=True, cache=True, nogil=True)
+    def accumulate_density(positions, density, offsets, strip_start, order):
+        # Histogram poloh částic v jedné mřížce, vrací největší počet na pixel. Indexy pixelů částic se
+        # nejdřív roztřídí podle svislých pruhů (counting sort do order), pak každé vlákno počítá jen do
+        # sloupců svých pruhů, takže se nepřepisují navzájem. Pruhy dostávají vlákna na přeskáčku,
+        # hustý střed galaxie se tak rozdělí mezi všechna.
+        n = positions.shape[0]
+        width = density.shape[0]
+        height = density.shape[1]
+        chunks = offsets.shape[0]
+        strips = offsets.shape[1]
+        if chunks == 1:
+            # Jedno vlákno nemá s kým sdílet, třídění by jen zdržovalo
+            density[:] = 0
+            peak = 0
+            for i in range(n):
+                x = positions[i, 0]
+                y = positions[i, 1]
+                if x >= 0 and x < width and y >= 0 and y < height:
+                    density[int(x), int(y)] += 1
+                    peak = max(peak, density[int(x), int(y)])
+            return peak
+
+        for c in prange(chunks):
+            offsets[c] = 0
+            for i in range(c * n // chunks, (c + 1) * n // chunks):
+                x = positions[i, 0]
+                y = positions[i, 1]
+                if x >= 0 and x < width and y >= 0 and y < height:
+                    offsets[c, int(x) * strips // width] += 1
+
+        # Začátky pruhů v order a v nich úseky jednotlivých kusů pole částic
+        total = 0
+        for s in range(strips):
+            strip_start[s] = total
+            for c in range(chunks):
+                count = offsets[c, s]
+                offsets[c, s] = total
+                total += count
+        strip_start[strips] = total
+
+        for c in prange(chunks):
+            for i in range(c * n // chunks, (c + 1) * n // chunks):
+                x = positions[i, 0]
+                y = positions[i, 1]
+                if x >= 0 and x < width and y >= 0 and y < height:
+                    s = int(x) * strips // width
+                    order[offsets[c, s]] = int(x) * height + int(y)
+                    offsets[c, s] += 1
+
+        flat = density.reshape(width * height)
+        strip_peak = np.zeros(strips, dtype=np.int64)
+        for t in prange(chunks):
+            for s in range(t, strips, chunks):
+                density[(s * width + strips - 1) // strips:((s + 1) * width + strips - 1) // strips] = 0
+                peak = 0
+                for k in range(strip_start[s], strip_start[s + 1]):
+                    pixel = order[k]
+                    flat[pixel] += 1
+                    peak = max(peak, flat[pixel])
+                strip_peak[s] = peak
+        return strip_peak.max()
+
+    @njit("void(uint32[:, ::1], int64, uint8[:, :, :], float64, float64, float32[::1], float32[:, ::1])",
+          parallel=True, cache=True, nogil=True)
+    def tone_map_density(density, peak, pixels, sun_x, sun_y, bands, palette):
+        # Jas = log(1 + hustota) / log(1 + max), barva podle pásma vzdálenosti
+        width = density.shape[0]
+        height = density.shape[1]
+        scale = 1.0 / np.log1p(max(peak, 1))
+        for x in prange(width):
+            for y in range(height):
+                brightness = np.log1p(density[x, y]) * scale
+                dx = x - sun_x
+                dy = y - sun_y
+                dist = np.sqrt(dx*dx + dy*dy)
+                band = 0
+                while band < bands.shape[0] and dist >= bands[band]:
+                    band += 1
+                for c in range(3):
+                    pixels[x, y, c] = int(palette[band, c] * brightness)
+
+    @njit("void(float32[:, ::1], float32[::1], float64, float64, float64[:, :, ::1])",
+          parallel=True, cache=True, nogil=True)
+    def deposit_mass(positions, masses, cell, mass_scale, layers):
+        # Cloud-in-cell: hmotnost částice se rozdělí mezi čtyři nejbližší středy buněk,
+        # každé vlákno do své vrstvy mřížky
+        n = positions.shape[0]
+        count = layers.shape[0]
+        grid_x = layers.shape[1]
+        grid_y = layers.shape[2]
+        for layer in prange(count):
+            layers[layer] = 0.0
+            for i in range(layer * n // count, (layer + 1) * n // count):
+                u = positions[i, 0] / cell - 0.5
+                v = positions[i, 1] / cell - 0.5
+                ix = int(np.floor(u))
+                iy = int(np.floor(v))
+                if ix < 0 or iy < 0 or ix + 1 >= grid_x or iy + 1 >= grid_y:
+                    continue
+                fx = u - ix
+                fy = v - iy
+                m = masses[i] * mass_scale
+                layers[layer, ix, iy] += m * (1.0 - fx) * (1.0 - fy)
+                layers[layer, ix + 1, iy] += m * fx * (1.0 - fy)
+                layers[layer, ix, iy + 1] += m * (1.0 - fx) * fy
+                layers[layer, ix + 1, iy + 1] += m * fx * fy
+
+    @njit("void(float32[:, ::1], float32[:, ::1], float64[:, ::1], float64[:, ::1], float64)",
+          parallel=True, cache=True, nogil=True)
+    def kick_from_mesh(positions, velocities, acc_x, acc_y, cell):
+        # Zrychlení z mřížky zpět na částice stejnými vahami jako při ukládání (bez vlastní síly)
+        grid_x = acc_x.shape[0]
+        grid_y = acc_x.shape[1]
+        for i in prange(positions.shape[0]):
+            u = positions[i, 0] / cell - 0.5
+            v = positions[i, 1] / cell - 0.5
+            ix = int(np.floor(u))
+            iy = int(np.floor(v))
+            if ix < 0 or iy < 0 or ix + 1 >= grid_x or iy + 1 >= grid_y:
+                continue
+            fx = u - ix
+            fy = v - iy
+            w00 = (1.0 - fx) * (1.0 - fy)
+            w10 = fx * (1.0 - fy)
+            w01 = (1.0 - fx) * fy
+            w11 = fx * fy
+            velocities[i, 0] += (w00 * acc_x[ix, iy] + w10 * acc_x[ix + 1, iy]
+                                 + w01 * acc_x[ix, iy + 1] + w11 * acc_x[ix + 1, iy + 1])
+            velocities[i, 1] += (w00 * acc_y[ix, iy] + w10 * acc_y[ix + 1, iy]
+                                 + w01 * acc_y[ix, iy + 1] + w11 * acc_y[ix + 1, iy + 1])
+
+    KERNELS = (apply_galaxy_gravity_and_update, compact_particles, accumulate_density, tone_map_density, deposit_mass,
+               kick_from_mesh)
+
+else:
+    # Bez numba: NumPy přes celá pole - histogram záře přes np.bincount, cloud-in-cell přes váhy
+    # čtyř sousedních buněk (mesh_weights).
+
+    def apply_galaxy_gravity_and_update(positions, velocities, masses, alive, sun_x, sun_y, sun_mass, g,
+                                        speed_multiplier, horizon, swirl):
+        dx = sun_x - positions[:, 0]
+        dy = sun_y - positions[:, 1]
+        dist_sq = dx*dx + dy*dy
+        dist = np.sqrt(dist_sq)
+        inside = dist < horizon
+        alive[:] = ~inside
+        outside = ~inside
+        dx = dx[outside]
+        dy = dy[outside]
+        dist = dist[outside]
+        force = g * sun_mass / dist_sq[outside]
+        velocities[outside, 0] += force * dx / dist + swirl * -dy / (dist + 1e-5)
+        velocities[outside, 1] += force * dy / dist + swirl * dx / (dist + 1e-5)
+        positions[outside] += velocities[outside] * speed_multiplier
+        return int(np.count_nonzero(inside))
+
+    def compact_particles(positions, velocities, masses, alive, ids, count):
+        keep = alive[:count].astype(bool)
+        new_count = int(np.count_nonzero(keep))
+        positions[:new_count] = positions[:count][keep]
+        velocities[:new_count] = velocities[:count][keep]
+        masses[:new_count] = masses[:count][keep]
+        ids[:new_count] = ids[:count][keep]
+        alive[:new_count] = 1
+        return new_count
+
+    def accumulate_density(positions, density, offsets, strip_start, order):
+        width, height = density.shape
+        x = positions[:, 0]
+        y = positions[:, 1]
+        inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+        index = x[inside].astype(np.int64) * height + y[inside].astype(np.int64)
+        density[:] = np.bincount(index, minlength=width * height).reshape(width, height)
+        return int(density.max())
+
+    def tone_map_density(density, peak, pixels, sun_x, sun_y, bands, palette):
+        width, height = density.shape
+        brightness = np.log1p(density) / np.log1p(max(peak, 1))
+        dx = np.arange(width)[:, None] - sun_x
+        dy = np.arange(height)[None, :] - sun_y
+        band = np.searchsorted(bands, np.sqrt(dx*dx + dy*dy), side="right")
+        pixels[:] = (palette[band] * brightness[:, :, None]).astype(np.uint8)
+
+    def mesh_weights(positions, cell, grid_x, grid_y):
+        u = positions[:, 0] / cell - 0.5
+        v = positions[:, 1] / cell - 0.5
+        ix = np.floor(u).astype(np.int64)
+        iy = np.floor(v).astype(np.int64)
+        inside = (ix >= 0) & (iy >= 0) & (ix + 1 < grid_x) & (iy + 1 < grid_y)
+        ix = ix[inside]
+        iy = iy[inside]
+        fx = u[inside] - ix
+        fy = v[inside] - iy
+        cells = ((ix, iy), (ix + 1, iy), (ix, iy + 1), (ix + 1, iy + 1))
+        weights = ((1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy)
+        return inside, cells, weights
+
+    def deposit_mass(positions, masses, cell, mass_scale, layers):
+        layers[:] = 0.0
+        grid_x, grid_y = layers.shape[1:]
+        inside, cells, weights = mesh_weights(positions, cell, grid_x, grid_y)
+        m = masses[inside] * mass_scale
+        for (ix, iy), w in zip(cells, weights):
+            layers[0] += np.bincount(ix * grid_y + iy, m * w, minlength=grid_x * grid_y).reshape(grid_x, grid_y)
+
+    def kick_from_mesh(positions, velocities, acc_x, acc_y, cell):
+        inside, cells, weights = mesh_weights(positions, cell, *acc_x.shape)
+        ax = sum(w * acc_x[ix, iy] for (ix, iy), w in zip(cells, weights))
+        ay = sum(w * acc_y[ix, iy] for (ix, iy), w in zip(cells, weights))
+        velocities[inside, 0] += ax
+        velocities[inside, 1] += ay
+
+    KERNELS = ()
+
+
+class DensityMap:
+    # Histogram pro záři - jedna mřížka velikosti okna, vlákna si ji dělí po svislých pruzích.
+    # Pole pro třídění částic podle pruhů je potřeba jen pro víc vláken a jen se zvětšuje.
+    def __init__(self, width, height):
+        threads = get_num_threads() if NUMBA else 1
+        strips = threads * DENSITY_STRIPS
+        self.density = np.empty((width, height), dtype=np.uint32)
+        self.offsets = np.empty((threads, strips), dtype=np.int64)
+        self.strip_start = np.empty(strips + 1, dtype=np.int64)
+        self.order = np.empty(0, dtype=np.int32)
+
+    def draw(self, pixels, positions, sun_x, sun_y, bands, palette):
+        if self.offsets.shape[0] > 1 and positions.shape[0] > self.order.shape[0]:
+            self.order = np.empty(max(positions.shape[0], 2 * self.order.shape[0]), dtype=np.int32)
+        peak = accumulate_density(positions, self.density, self.offsets, self.strip_start, self.order)
+        tone_map_density(self.density, peak, pixels, sun_x, sun_y, bands, palette)
+
+
+def negative_gradient(field, step, out_x, out_y):
+    # -np.gradient(field, step) do připravených polí: uvnitř centrální diference, na okrajích jednostranné.
+    # Všechno nad souvislými poli, jinak si NumPy bere pomocné buffery. Podél y se počítá přes ploché pole,
+    # hodnoty přes konec řádku padnou do krajních sloupců a ty se přepíšou.
+    np.subtract(field[:-2], field[2:], out=out_x[1:-1])
+    np.divide(out_x[1:-1], 2.0 * step, out=out_x[1:-1])
+    flat = field.reshape(-1)
+    flat_y = out_y.reshape(-1)
+    np.subtract(flat[:-2], flat[2:], out=flat_y[1:-1])
+    np.divide(flat_y[1:-1], 2.0 * step, out=flat_y[1:-1])
+    for out, first, second, last, before_last in ((out_x, field[0], field[1], field[-1], field[-2]),
+                                                 (out_y.T, field[:, 0], field[:, 1], field[:, -1], field[:, -2])):
+        np.subtract(first, second, out=out[0])
+        np.subtract(before_last, last, out=out[-1])
+        out[0] /= step
+        out[-1] /= step
+
+
+class ParticleMesh:
+    # Vlastní gravitace disku metodou particle-mesh: hmotnost na mřížku (cloud-in-cell),
+    # potenciál konvolucí s Greenovou funkcí přes FFT a zrychlení zpět na částice.
+    # Mřížka se doplní nulami na dvojnásobek, aby se disk nepřitahoval se svými periodickými kopiemi.
+    # Všechna pole se alokují jednou, s numba a NumPy 2 (FFT_OUT) krok už nic nealokuje.
+    def __init__(self, width, height, cells, g):
+        self.cell = max(width, height) / cells
+        self.grid_x = int(np.ceil(width / self.cell))
+        self.grid_y = int(np.ceil(height / self.cell))
+        layers = get_num_threads() if NUMBA else 1
+        self.layers = np.empty((layers, self.grid_x, self.grid_y), dtype=np.float64)
+        self.padded = np.zeros((2 * self.grid_x, 2 * self.grid_y), dtype=np.float64)
+        self.spectrum = np.empty((2 * self.grid_x, self.grid_y + 1), dtype=np.complex128)
+        self.potential = np.empty_like(self.padded)
+        self.field = np.empty((self.grid_x, self.grid_y), dtype=np.float64)
+        self.acc_x = np.empty((self.grid_x, self.grid_y), dtype=np.float64)
+        self.acc_y = np.empty((self.grid_x, self.grid_y), dtype=np.float64)
+
+        # Potenciál bodové hmotnosti -g / r (změkčený na velikost buňky), vzdálenosti přes okraj dokola
+        ix = np.arange(2 * self.grid_x)
+        iy = np.arange(2 * self.grid_y)
+        dx = np.minimum(ix, 2 * self.grid_x - ix)[:, None] * self.cell
+        dy = np.minimum(iy, 2 * self.grid_y - iy)[None, :] * self.cell
+        self.green = np.fft.rfft2(-g / np.sqrt(dx*dx + dy*dy + self.cell * self.cell))
+
+    def kick(self, positions, velocities, masses, mass_scale):
+        if positions.shape[0] == 0:
+            return
+        deposit_mass(positions, masses, self.cell, mass_scale, self.layers)
+        np.sum(self.layers, axis=0, out=self.field)
+        np.copyto(self.padded[:self.grid_x, :self.grid_y], self.field)
+        if FFT_OUT:
+            np.fft.rfft2(self.padded, out=self.spectrum)
+            self.spectrum *= self.green
+            # irfft2 nad dvěma osami out= nepoužije, proto zvlášť po osách
+            np.fft.ifft(self.spectrum, axis=0, out=self.spectrum)
+            np.fft.irfft(self.spectrum, n=self.padded.shape[1], axis=1, out=self.potential)
+        else:
+            self.potential[:] = np.fft.irfft2(np.fft.rfft2(self.padded) * self.green, s=self.padded.shape)
+        np.copyto(self.field, self.potential[:self.grid_x, :self.grid_y])
+        negative_gradient(self.field, self.cell, self.acc_x, self.acc_y)
+        kick_from_mesh(positions, velocities, self.acc_x, self.acc_y, self.cell)
+
+
+STARTUP_TIME = time.perf_counter() - start_time
+
+def startup_report():
+    return kernel_report(KERNELS, STARTUP_TIME)
@@ -0,0 +1,413 @@
+# jadra_gravitace.py
+# Numba jádra pro Gravitace.py.
+# Přitahovače s integrátorem Euler/leapfrog po podkrocích, vykreslení částic do pixelů obrazovky,
+# energie a moment hybnosti pro drift a vzájemná gravitace přes Barnes-Hut (QuadTree) nebo přímý součet.
+
+import time
+
+import numpy as np
+
+from jadra import NUMBA, kernel_report
+
+if NUMBA:
+    from numba import njit, prange
+
+start_time = time.perf_counter()
+
+# Integrátory pro apply_gravity_and_update
+INTEGRATOR_EULER = 0
+INTEGRATOR_LEAPFROG = 1
+INTEGRATOR_NAMES = ("Euler", "leapfrog")
+
+# Barnes-Hut
+BH_MIN_HALF = 1e-3    # nejmenší uzel, hlubší částice se sečtou do jednoho listu
+BH_STACK = 256
+
+if NUMBA:
+    @njit("UniTuple(float64, 2)(float64, float64, float64[:, ::1], float64)", cache=True, nogil=True)
+    def attractor_acceleration(x, y, attractors, g):
+        # Součet přes tabulku přitahovačů (řádek = x, y, hmotnost), celá se vejde do L1 cache
+        ax = 0.0
+        ay = 0.0
+        for k in range(attractors.shape[0]):
+            dx = attractors[k, 0] - x
+            dy = attractors[k, 1] - y
+            dist_sq = dx*dx + dy*dy
+            dist = np.sqrt(dist_sq)
+            if dist < 1:
+                continue
+            a = g * attractors[k, 2] / (dist_sq * dist)
+            ax += a * dx
+            ay += a * dy
+        return ax, ay
+
+    @njit("void(float32[:, ::1], float32[:, ::1], float32[:, ::1], float64[:, ::1], float64, float64, int64, int64)",
+          parallel=True, cache=True, nogil=True)
+    def apply_gravity_and_update(positions, velocities, accelerations, attractors, g, dt, substeps, integrator):
+        # Celý snímek (dt) rozdělený na substeps kroků v jednom průchodu,
+        # accelerations je zrychlení od ostatních částic, konstantní po celý snímek
+        h = dt / substeps
+        for i in prange(positions.shape[0]):
+            x = np.float64(positions[i, 0])
+            y = np.float64(positions[i, 1])
+            vx = np.float64(velocities[i, 0])
+            vy = np.float64(velocities[i, 1])
+            ex = accelerations[i, 0]
+            ey = accelerations[i, 1]
+            if integrator == INTEGRATOR_LEAPFROG:
+                # kick-drift-kick
+                ax, ay = attractor_acceleration(x, y, attractors, g)
+                for _ in range(substeps):
+                    vx += 0.5 * h * (ax + ex)
+                    vy += 0.5 * h * (ay + ey)
+                    x += h * vx
+                    y += h * vy
+                    ax, ay = attractor_acceleration(x, y, attractors, g)
+                    vx += 0.5 * h * (ax + ex)
+                    vy += 0.5 * h * (ay + ey)
+            else:
+                # semi-implicitní Euler
+                for _ in range(substeps):
+                    ax, ay = attractor_acceleration(x, y, attractors, g)
+                    vx += h * (ax + ex)
+                    vy += h * (ay + ey)
+                    x += h * vx
+                    y += h * vy
+            positions[i, 0] = x
+            positions[i, 1] = y
+            velocities[i, 0] = vx
+            velocities[i, 1] = vy
+
+    @njit("UniTuple(float64, 2)(float32[:, ::1], float32[:, ::1], float32[::1], float64[:, ::1], float64)",
+          parallel=True, cache=True, nogil=True)
+    def energy_and_momentum(positions, velocities, masses, attractors, g):
+        # Celková energie v poli přitahovačů a moment hybnosti vůči jejich těžišti
+        # (bez vzájemné gravitace částic)
+        total_mass = 0.0
+        center_x = 0.0
+        center_y = 0.0
+        for k in range(attractors.shape[0]):
+            total_mass += attractors[k, 2]
+            center_x += attractors[k, 2] * attractors[k, 0]
+            center_y += attractors[k, 2] * attractors[k, 1]
+        center_x /= total_mass
+        center_y /= total_mass
+
+        energy = 0.0
+        momentum = 0.0
+        for i in prange(positions.shape[0]):
+            x = positions[i, 0]
+            y = positions[i, 1]
+            vx = velocities[i, 0]
+            vy = velocities[i, 1]
+            potential = 0.0
+            for k in range(attractors.shape[0]):
+                dx = x - attractors[k, 0]
+                dy = y - attractors[k, 1]
+                potential -= g * attractors[k, 2] / max(np.sqrt(dx*dx + dy*dy), 1.0)
+            energy += masses[i] * (0.5 * (vx*vx + vy*vy) + potential)
+            momentum += masses[i] * ((x - center_x) * vy - (y - center_y) * vx)
+        return energy, momentum
+
+    @njit("void(uint32[:, :], float32[:, ::1], float64[:, ::1], float32[::1], uint32[::1])", cache=True, nogil=True)
+    def draw_particles(pixels, positions, attractors, bands, palette):
+        # Vykreslí všechny částice najednou přímo do pixelů obrazovky (2x2 tečky),
+        # barva podle vzdálenosti k nejbližšímu přitahovači. Běží v jednom vlákně - paralelní
+        # jádra spouští jen vlákno fyziky, výchozí vrstva vláken numba souběžné spouštění nesnese.
+        width = pixels.shape[0]
+        height = pixels.shape[1]
+        for i in range(positions.shape[0]):
+            dist_sq = np.inf
+            for k in range(attractors.shape[0]):
+                dx = positions[i, 0] - attractors[k, 0]
+                dy = positions[i, 1] - attractors[k, 1]
+                dist_sq = min(dist_sq, dx*dx + dy*dy)
+            dist = np.sqrt(dist_sq)
+            band = 0
+            while band < bands.shape[0] and dist >= bands[band]:
+                band += 1
+            color = palette[band]
+
+            x = int(positions[i, 0])
+            y = int(positions[i, 1])
+            for px in range(x - 1, x + 1):
+                if px < 0 or px >= width:
+                    continue
+                for py in range(y - 1, y + 1):
+                    if py < 0 or py >= height:
+                        continue
+                    pixels[px, py] = color
+
+    @njit("int64(float32[:, ::1], float32[::1], int32[:, ::1], int32[::1], float64[::1], float64[::1], "
+          "float64[::1], float64[::1], float64[::1], float64[::1])", cache=True, nogil=True)
+    def build_quadtree(positions, masses, child, body, node_mass, com_x, com_y, center_x, center_y, half):
+        # Postaví quadtree vkládáním částic, vrátí počet uzlů nebo -1 když dojde místo
+        n = positions.shape[0]
+        capacity = child.shape[0]
+        min_x = max_x = positions[0, 0]
+        min_y = max_y = positions[0, 1]
+        for i in range(1, n):
+            min_x = min(min_x, positions[i, 0])
+            max_x = max(max_x, positions[i, 0])
+            min_y = min(min_y, positions[i, 1])
+            max_y = max(max_y, positions[i, 1])
+
+        child[0, :] = -1
+        body[0] = -1
+        node_mass[0] = 0.0
+        com_x[0] = 0.0
+        com_y[0] = 0.0
+        center_x[0] = 0.5 * (min_x + max_x)
+        center_y[0] = 0.5 * (min_y + max_y)
+        half[0] = 0.5 * max(max_x - min_x, max_y - min_y) + 1e-3
+        count = 1
+
+        for i in range(n):
+            x = positions[i, 0]
+            y = positions[i, 1]
+            m = masses[i]
+            node = 0
+            while True:
+                node_mass[node] += m
+                com_x[node] += m * x
+                com_y[node] += m * y
+                if body[node] >= 0:
+                    # List s jednou částicí - rozdělit, pokud to velikost dovolí
+                    if half[node] < BH_MIN_HALF:
+                        break
+                    j = body[node]
+                    body[node] = -1
+                    if count >= capacity:
+                        return -1
+                    q = int(positions[j, 0] >= center_x[node]) + 2 * int(positions[j, 1] >= center_y[node])
+                    c = count
+                    count += 1
+                    child[node, q] = c
+                    child[c, :] = -1
+                    body[c] = j
+                    node_mass[c] = masses[j]
+                    com_x[c] = masses[j] * positions[j, 0]
+                    com_y[c] = masses[j] * positions[j, 1]
+                    half[c] = 0.5 * half[node]
+                    center_x[c] = center_x[node] + (half[c] if q & 1 else -half[c])
+                    center_y[c] = center_y[node] + (half[c] if q & 2 else -half[c])
+
+                q = int(x >= center_x[node]) + 2 * int(y >= center_y[node])
+                c = child[node, q]
+                if c == -1:
+                    if count >= capacity:
+                        return -1
+                    c = count
+                    count += 1
+                    child[node, q] = c
+                    child[c, :] = -1
+                    body[c] = i
+                    node_mass[c] = m
+                    com_x[c] = m * x
+                    com_y[c] = m * y
+                    half[c] = 0.5 * half[node]
+                    center_x[c] = center_x[node] + (half[c] if q & 1 else -half[c])
+                    center_y[c] = center_y[node] + (half[c] if q & 2 else -half[c])
+                    break
+                node = c
+
+        for k in range(count):
+            if node_mass[k] > 0:
+                com_x[k] /= node_mass[k]
+                com_y[k] /= node_mass[k]
+        return count
+
+    @njit("void(float32[:, ::1], int32[:, ::1], int32[::1], float64[::1], float64[::1], float64[::1], "
+          "float64[::1], float64, float64, float64, float32[:, ::1])", parallel=True, cache=True, nogil=True)
+    def barnes_hut_accelerations(positions, child, body, node_mass, com_x, com_y, half, theta, g, softening, acc):
+        # Zrychlení od ostatních částic procházením stromu, paralelně po blocích částic
+        n = positions.shape[0]
+        theta_sq = theta * theta
+        eps_sq = softening * softening
+        chunks = min(n, 64)
+        for chunk in prange(chunks):
+            stack = np.empty(BH_STACK, dtype=np.int32)
+            for i in range(chunk * n // chunks, (chunk + 1) * n // chunks):
+                x = positions[i, 0]
+                y = positions[i, 1]
+                ax = 0.0
+                ay = 0.0
+                stack[0] = 0
+                sp = 1
+                while sp > 0:
+                    sp -= 1
+                    node = stack[sp]
+                    dx = com_x[node] - x
+                    dy = com_y[node] - y
+                    dist_sq = dx*dx + dy*dy
+                    size = 2.0 * half[node]
+                    if body[node] >= 0 or size * size < theta_sq * dist_sq:
+                        if body[node] == i:
+                            continue
+                        r_sq = dist_sq + eps_sq
+                        inv = g * node_mass[node] / (r_sq * np.sqrt(r_sq))
+                        ax += dx * inv
+                        ay += dy * inv
+                    else:
+                        for q in range(4):
+                            c = child[node, q]
+                            if c != -1:
+                                stack[sp] = c
+                                sp += 1
+                acc[i, 0] = ax
+                acc[i, 1] = ay
+
+    @njit("void(float32[:, ::1], float32[::1], float64, float64, float32[:, ::1])",
+          parallel=True, cache=True, nogil=True)
+    def direct_accelerations(positions, masses, g, softening, acc):
+        # Referenční O(N²) výpočet pro kontrolu přesnosti Barnes-Hut
+        n = positions.shape[0]
+        eps_sq = softening * softening
+        for i in prange(n):
+            ax = 0.0
+            ay = 0.0
+            for j in range(n):
+                if j == i:
+                    continue
+                dx = positions[j, 0] - positions[i, 0]
+                dy = positions[j, 1] - positions[i, 1]
+                r_sq = dx*dx + dy*dy + eps_sq
+                inv = g * masses[j] / (r_sq * np.sqrt(r_sq))
+                ax += dx * inv
+                ay += dy * inv
+            acc[i, 0] = ax
+            acc[i, 1] = ay
+
+    KERNELS = (attractor_acceleration, apply_gravity_and_update, energy_and_momentum, draw_particles, build_quadtree,
+               barnes_hut_accelerations, direct_accelerations)
+
+else:
+    # Bez numba: NumPy přes celá pole částic, smyčky jen přes přitahovače a podkroky.
+    # Strom se nestaví, QuadTree.accelerations použije přímý součet po blocích 1024 částic.
+
+    def attractor_acceleration(x, y, attractors, g):
+        ax = np.zeros_like(x)
+        ay = np.zeros_like(y)
+        for attractor_x, attractor_y, mass in attractors:
+            dx = attractor_x - x
+            dy = attractor_y - y
+            dist_sq = dx*dx + dy*dy
+            dist = np.sqrt(dist_sq)
+            a = np.zeros_like(dist)
+            np.divide(g * mass, dist_sq * dist, out=a, where=dist >= 1)
+            ax += a * dx
+            ay += a * dy
+        return ax, ay
+
+    def apply_gravity_and_update(positions, velocities, accelerations, attractors, g, dt, substeps, integrator):
+        h = dt / substeps
+        x = positions[:, 0].astype(np.float64)
+        y = positions[:, 1].astype(np.float64)
+        vx = velocities[:, 0].astype(np.float64)
+        vy = velocities[:, 1].astype(np.float64)
+        ex = accelerations[:, 0]
+        ey = accelerations[:, 1]
+        if integrator == INTEGRATOR_LEAPFROG:
+            ax, ay = attractor_acceleration(x, y, attractors, g)
+            for _ in range(substeps):
+                vx += 0.5 * h * (ax + ex)
+                vy += 0.5 * h * (ay + ey)
+                x += h * vx
+                y += h * vy
+                ax, ay = attractor_acceleration(x, y, attractors, g)
+                vx += 0.5 * h * (ax + ex)
+                vy += 0.5 * h * (ay + ey)
+        else:
+            for _ in range(substeps):
+                ax, ay = attractor_acceleration(x, y, attractors, g)
+                vx += h * (ax + ex)
+                vy += h * (ay + ey)
+                x += h * vx
+                y += h * vy
+        positions[:, 0] = x
+        positions[:, 1] = y
+        velocities[:, 0] = vx
+        velocities[:, 1] = vy
+
+    def energy_and_momentum(positions, velocities, masses, attractors, g):
+        x = positions[:, 0].astype(np.float64)
+        y = positions[:, 1].astype(np.float64)
+        vx = velocities[:, 0].astype(np.float64)
+        vy = velocities[:, 1].astype(np.float64)
+        center_x, center_y = np.average(attractors[:, :2], axis=0, weights=attractors[:, 2])
+        potential = np.zeros_like(x)
+        for attractor_x, attractor_y, mass in attractors:
+            potential -= g * mass / np.maximum(np.sqrt((x - attractor_x) ** 2 + (y - attractor_y) ** 2), 1.0)
+        energy = np.sum(masses * (0.5 * (vx*vx + vy*vy) + potential))
+        momentum = np.sum(masses * ((x - center_x) * vy - (y - center_y) * vx))
+        return float(energy), float(momentum)
+
+    def draw_particles(pixels, positions, attractors, bands, palette):
+        dist_sq = np.full(positions.shape[0], np.inf)
+        for attractor_x, attractor_y, _ in attractors:
+            np.minimum(dist_sq, (positions[:, 0] - attractor_x) ** 2 + (positions[:, 1] - attractor_y) ** 2,
+                       out=dist_sq)
+        dist = np.sqrt(dist_sq)
+        colors = palette[np.searchsorted(bands, dist, side="right")]
+        x = positions[:, 0].astype(np.int64)
+        y = positions[:, 1].astype(np.int64)
+        width, height = pixels.shape
+        for ox in (-1, 0):
+            for oy in (-1, 0):
+                px = x + ox
+                py = y + oy
+                inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+                pixels[px[inside], py[inside]] = colors[inside]
+
+    def direct_accelerations(positions, masses, g, softening, acc):
+        # Po blocích, aby matice vzdáleností nezabrala příliš paměti
+        pos = positions.astype(np.float64)
+        eps_sq = softening * softening
+        for start in range(0, pos.shape[0], 1024):
+            block = pos[start:start + 1024]
+            dx = pos[None, :, 0] - block[:, None, 0]
+            dy = pos[None, :, 1] - block[:, None, 1]
+            r_sq = dx*dx + dy*dy + eps_sq
+            inv = g * masses[None, :] / (r_sq * np.sqrt(r_sq))
+            inv[np.arange(block.shape[0]), np.arange(start, start + block.shape[0])] = 0.0
+            acc[start:start + 1024, 0] = np.sum(dx * inv, axis=1)
+            acc[start:start + 1024, 1] = np.sum(dy * inv, axis=1)
+
+    KERNELS = ()
+
+
+class QuadTree:
+    # Předalokované pole uzlů, při nedostatku místa se zdvojnásobí
+    def __init__(self, capacity):
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.child = np.empty((capacity, 4), dtype=np.int32)
+        self.body = np.empty(capacity, dtype=np.int32)
+        self.node_mass = np.empty(capacity, dtype=np.float64)
+        self.com_x = np.empty(capacity, dtype=np.float64)
+        self.com_y = np.empty(capacity, dtype=np.float64)
+        self.center_x = np.empty(capacity, dtype=np.float64)
+        self.center_y = np.empty(capacity, dtype=np.float64)
+        self.half = np.empty(capacity, dtype=np.float64)
+
+    def accelerations(self, positions, masses, theta, g, softening, acc):
+        if positions.shape[0] == 0:
+            return
+        if not NUMBA:
+            # Strom v čistém Pythonu by byl pomalejší než přímý součet v NumPy
+            direct_accelerations(positions, masses, g, softening, acc)
+            return
+        if self.child.shape[0] < 2 * positions.shape[0] + 1:
+            self.allocate(4 * positions.shape[0] + 1)
+        while build_quadtree(positions, masses, self.child, self.body, self.node_mass,
+                             self.com_x, self.com_y, self.center_x, self.center_y, self.half) < 0:
+            self.allocate(2 * self.child.shape[0])
+        barnes_hut_accelerations(positions, self.child, self.body, self.node_mass,
+                                 self.com_x, self.com_y, self.half, theta, g, softening, acc)
+
+
+STARTUP_TIME = time.perf_counter() - start_time
+
+def startup_report():
+    return kernel_report(KERNELS, STARTUP_TIME)
@@ -0,0 +1,231 @@
+# jadra_o.py
+# Numba jádra pro O.py.
+# Pohyb roje k myši, kreslení částic přímo do pixelů a částicový život přes seznam buněk (ParticleLife).
+
+import time
+
+import numpy as np
+
+from jadra import NUMBA, kernel_report
+
+if NUMBA:
+    from numba import njit, prange
+
+start_time = time.perf_counter()
+
+if NUMBA:
+    @njit("void(float32[::1], float32[::1], float32[::1], float32[::1], float64, float64, float64, float64, float64, "
+          "float64, float64, float64)", parallel=True, cache=True, nogil=True)
+    def update_swarm(x, y, vx, vy, target_x, target_y, pull, radius, max_speed, damping, width, height):
+        # Krok pro O.py - tah k cíli (pull < 0 odpuzuje) slábnoucí k okraji radius, omezení rychlosti,
+        # posun, tlumení a držení v okně
+        for i in prange(x.shape[0]):
+            px = np.float64(x[i])
+            py = np.float64(y[i])
+            ux = np.float64(vx[i])
+            uy = np.float64(vy[i])
+            dx = target_x - px
+            dy = target_y - py
+            dist = np.sqrt(dx*dx + dy*dy)
+            if dist < radius and dist > 5:
+                force = (radius - dist) / radius * pull / dist
+                ux += dx * force
+                uy += dy * force
+            speed = np.sqrt(ux*ux + uy*uy)
+            if speed > max_speed:
+                ux *= max_speed / speed
+                uy *= max_speed / speed
+            x[i] = min(max(px + ux, 0.0), width)
+            y[i] = min(max(py + uy, 0.0), height)
+            vx[i] = ux * damping
+            vy[i] = uy * damping
+
+    @njit("void(uint32[:, :], float32[::1], float32[::1], uint32[::1])", cache=True, nogil=True)
+    def draw_swarm(pixels, x, y, color):
+        # Tečky 1x1 pro O.py přímo do pixelů obrazovky, barvy už ve formátu obrazovky. V jednom vlákně
+        # a v pořadí polí, takže u společného pixelu vyhraje vždy pozdější částice - zápis je stejně
+        # omezený pamětí, ne výpočtem.
+        width = pixels.shape[0]
+        height = pixels.shape[1]
+        for i in range(x.shape[0]):
+            px = int(x[i])
+            py = int(y[i])
+            if px >= 0 and px < width and py >= 0 and py < height:
+                pixels[px, py] = color[i]
+
+    @njit("void(float32[::1], float32[::1], uint8[::1], float64, int64, int64[::1], int64[::1], int64[::1], "
+          "int64[::1], float32[::1], float32[::1], uint8[::1])", cache=True, nogil=True)
+    def build_cell_list(x, y, species, cell, cols, cell_start, cursor, cell_of, order, sorted_x, sorted_y,
+                        sorted_species):
+        # Třídění počítáním podle buňky mřížky (po řádcích): částice buňky c jsou
+        # order[cell_start[c]:cell_start[c + 1]] a jejich polohy a druhy se zkopírují do sorted_*,
+        # takže sousední buňky v řádku leží v paměti za sebou
+        cells = cursor.shape[0]
+        rows = cells // cols
+        cell_start[:] = 0
+        for i in range(x.shape[0]):
+            col = min(max(int(x[i] / cell), 0), cols - 1)
+            row = min(max(int(y[i] / cell), 0), rows - 1)
+            cell_of[i] = row * cols + col
+            cell_start[cell_of[i] + 1] += 1
+        for c in range(cells):
+            cell_start[c + 1] += cell_start[c]
+            cursor[c] = cell_start[c]
+        for i in range(x.shape[0]):
+            k = cursor[cell_of[i]]
+            cursor[cell_of[i]] += 1
+            order[k] = i
+            sorted_x[k] = x[i]
+            sorted_y[k] = y[i]
+            sorted_species[k] = species[i]
+
+    @njit("void(float32[::1], float32[::1], uint8[::1], int64[::1], int64[::1], int64, float32[:, ::1], float32, "
+          "float32, float32, float32[::1], float32[::1])", parallel=True, fastmath=True, cache=True, nogil=True)
+    def life_forces(sorted_x, sorted_y, sorted_species, order, cell_start, cols, matrix, radius, beta, strength,
+                    vx, vy):
+        # Částicový život pro O.py: sousedé blíž než beta * radius se odpuzují, dál do radius se přitahují
+        # (záporná hodnota odpuzuje) podle matrix[druh, druh souseda], nejsilněji v půli cesty.
+        # Sousedé jsou ve 3x3 buňkách o velikosti radius, tři buňky řádku tvoří jeden úsek v poli.
+        # Paralelně po řádcích mřížky, každá částice zapisuje jen svou rychlost.
+        # Vnitřní smyčka je ve float32 a bez větvení a fastmath smí přeřadit součet,
+        # takže se přeloží na SIMD - je tak asi třikrát rychlejší.
+        rows = (cell_start.shape[0] - 1) // cols
+        radius_sq = radius * radius
+        inv_radius = np.float32(1.0) / radius
+        inv_beta = np.float32(1.0) / beta
+        inv_span = np.float32(1.0) / (np.float32(1.0) - beta)
+        for row in prange(rows):
+            for col in range(cols):
+                c = row * cols + col
+                first = max(col - 1, 0)
+                last = min(col + 1, cols - 1)
+                for k in range(cell_start[c], cell_start[c + 1]):
+                    px = sorted_x[k]
+                    py = sorted_y[k]
+                    attraction = matrix[sorted_species[k]]
+                    ax = np.float32(0.0)
+                    ay = np.float32(0.0)
+                    for other_row in range(max(row - 1, 0), min(row + 2, rows)):
+                        for m in range(cell_start[other_row * cols + first], cell_start[other_row * cols + last + 1]):
+                            dx = sorted_x[m] - px
+                            dy = sorted_y[m] - py
+                            dist_sq = dx*dx + dy*dy
+                            inside = dist_sq < radius_sq and dist_sq > 0.0
+                            dist = np.sqrt(max(dist_sq, np.float32(1e-12)))
+                            r = dist * inv_radius
+                            repel = r * inv_beta - np.float32(1.0)
+                            peak = np.float32(1.0) - abs(np.float32(2.0) * r - np.float32(1.0) - beta) * inv_span
+                            attract = attraction[sorted_species[m]] * peak
+                            force = (repel if r < beta else attract) / dist
+                            force = force if inside else np.float32(0.0)
+                            ax += dx * force
+                            ay += dy * force
+                    i = order[k]
+                    vx[i] += strength * ax
+                    vy[i] += strength * ay
+
+    KERNELS = (update_swarm, draw_swarm, build_cell_list, life_forces)
+
+else:
+    # Bez numba: roj a kreslení vektorově v NumPy, seznam buněk přes argsort, síly života po buňkách -
+    # každá neprázdná buňka proti sousedním najednou.
+
+    def update_swarm(x, y, vx, vy, target_x, target_y, pull, radius, max_speed, damping, width, height):
+        dx = target_x - x
+        dy = target_y - y
+        dist = np.sqrt(dx*dx + dy*dy)
+        near = (dist < radius) & (dist > 5)
+        force = (radius - dist[near]) / radius * pull / dist[near]
+        vx[near] += dx[near] * force
+        vy[near] += dy[near] * force
+        speed = np.sqrt(vx*vx + vy*vy)
+        scale = np.minimum(1.0, max_speed / np.maximum(speed, 1e-12)).astype(np.float32)
+        vx *= scale
+        vy *= scale
+        x += vx
+        y += vy
+        np.clip(x, 0, width, out=x)
+        np.clip(y, 0, height, out=y)
+        vx *= damping
+        vy *= damping
+
+    def draw_swarm(pixels, x, y, color):
+        px = x.astype(np.int64)
+        py = y.astype(np.int64)
+        inside = (px >= 0) & (px < pixels.shape[0]) & (py >= 0) & (py < pixels.shape[1])
+        pixels[px[inside], py[inside]] = color[inside]
+
+    def build_cell_list(x, y, species, cell, cols, cell_start, cursor, cell_of, order, sorted_x, sorted_y,
+                        sorted_species):
+        cells = cursor.shape[0]
+        col = np.clip((x / cell).astype(np.int64), 0, cols - 1)
+        row = np.clip((y / cell).astype(np.int64), 0, cells // cols - 1)
+        cell_of[:] = row * cols + col
+        order[:] = np.argsort(cell_of, kind="stable")
+        cell_start[0] = 0
+        np.cumsum(np.bincount(cell_of, minlength=cells), out=cell_start[1:])
+        sorted_x[:] = x[order]
+        sorted_y[:] = y[order]
+        sorted_species[:] = species[order]
+
+    def life_forces(sorted_x, sorted_y, sorted_species, order, cell_start, cols, matrix, radius, beta, strength,
+                    vx, vy):
+        # Po buňkách: všechny částice buňky proti všem ze sousedních buněk najednou
+        rows = (cell_start.shape[0] - 1) // cols
+        for c in np.flatnonzero(np.diff(cell_start)):
+            row, col = divmod(c, cols)
+            first = max(col - 1, 0)
+            last = min(col + 1, cols - 1)
+            members = np.arange(cell_start[c], cell_start[c + 1])
+            others = np.concatenate([np.arange(cell_start[r * cols + first], cell_start[r * cols + last + 1])
+                                     for r in range(max(row - 1, 0), min(row + 2, rows))])
+            dx = sorted_x[others][None, :] - sorted_x[members][:, None]
+            dy = sorted_y[others][None, :] - sorted_y[members][:, None]
+            dist = np.sqrt(dx*dx + dy*dy)
+            r = dist / radius
+            attraction = matrix[sorted_species[members][:, None], sorted_species[others][None, :]]
+            peak = 1.0 - np.abs(2.0 * r - 1.0 - beta) / (1.0 - beta)
+            force = np.where(r < beta, r / beta - 1.0, attraction * peak)
+            force = np.where((r < 1.0) & (dist > 0.0), force / np.where(dist > 0.0, dist, 1.0), 0.0)
+            vx[order[members]] += strength * np.sum(dx * force, axis=1)
+            vy[order[members]] += strength * np.sum(dy * force, axis=1)
+
+    KERNELS = ()
+
+
+class ParticleLife:
+    # Seznam buněk pro částicový život v O.py, buňka má velikost dosahu interakce.
+    # Mřížka se staví znovu každý snímek, pomocná pole po částicích se jen zvětšují.
+    def __init__(self, width, height, radius):
+        self.radius = radius
+        self.cols = int(width // radius) + 1
+        rows = int(height // radius) + 1
+        self.cell_start = np.empty(self.cols * rows + 1, dtype=np.int64)
+        self.cursor = np.empty(self.cols * rows, dtype=np.int64)
+        self.allocate(0)
+
+    def allocate(self, capacity):
+        self.cell_of = np.empty(capacity, dtype=np.int64)
+        self.order = np.empty(capacity, dtype=np.int64)
+        self.sorted_x = np.empty(capacity, dtype=np.float32)
+        self.sorted_y = np.empty(capacity, dtype=np.float32)
+        self.sorted_species = np.empty(capacity, dtype=np.uint8)
+
+    def kick(self, x, y, vx, vy, species, matrix, beta, strength):
+        n = x.shape[0]
+        if n > self.order.shape[0]:
+            self.allocate(max(n, 2 * self.order.shape[0]))
+        order = self.order[:n]
+        sorted_x = self.sorted_x[:n]
+        sorted_y = self.sorted_y[:n]
+        sorted_species = self.sorted_species[:n]
+        build_cell_list(x, y, species, self.radius, self.cols, self.cell_start, self.cursor, self.cell_of[:n],
+                        order, sorted_x, sorted_y, sorted_species)
+        life_forces(sorted_x, sorted_y, sorted_species, order, self.cell_start, self.cols, matrix, self.radius,
+                    beta, strength, vx, vy)
+
+
+STARTUP_TIME = time.perf_counter() - start_time
+
+def startup_report():
+    return kernel_report(KERNELS, STARTUP_TIME)
@@ -0,0 +1,142 @@
+# jadra_slunko.py
+# Numba jádra pro slunko.py.
+# Gravitace slunce s tlumením pro všechna tělesa jedním průchodem a slučování blízkých částic
+# téže planety přes seřazené klíče buněk.
+
+import math
+import time
+
+import numpy as np
+
+from jadra import CELL_BITS, CELL_OFFSET, NUMBA, kernel_report
+
+if NUMBA:
+    from numba import njit, prange
+
+start_time = time.perf_counter()
+
+if NUMBA:
+    @njit("void(float64[::1], float64[::1], float64[::1], float64[::1], float64, float64, float64, float64, float64)",
+          parallel=True, cache=True, nogil=True)
+    def apply_sun_gravity(x, y, vx, vy, center_x, center_y, gm, min_dist, damping):
+        # Krok pro slunko.py - přitažlivost Slunce (vzdálenost nejméně min_dist), tlumení a posun
+        for i in prange(x.shape[0]):
+            dx = center_x - x[i]
+            dy = center_y - y[i]
+            dist = max(np.sqrt(dx*dx + dy*dy), min_dist)
+            force = gm / (dist * dist * dist)
+            vx[i] = (vx[i] + force * dx) * damping
+            vy[i] = (vy[i] + force * dy) * damping
+            x[i] += vx[i]
+            y[i] += vy[i]
+
+    @njit("void(float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], int32[::1], "
+          "uint8[::1], float64, float64, uint8[::1])", cache=True, nogil=True)
+    def merge_close_particles(x, y, vx, vy, mass, radius, planet, merged, merge_dist, planet_mass, alive):
+        # Postupně od nejnižšího indexu slije každou částici s nejbližším vyšším indexem téže planety
+        # blíž než merge_dist. Sousedy hledá v seřazených klíčích buněk (planeta, sloupec, řádek).
+        # Sloučená částice zůstane na místě první, druhá dostane alive = 0; nad planet_mass se z ní stane planeta.
+        n = x.shape[0]
+        limit = CELL_OFFSET - 2
+        cx = np.empty(n, dtype=np.int64)
+        cy = np.empty(n, dtype=np.int64)
+        keys = np.empty(n, dtype=np.int64)
+        for i in range(n):
+            cx[i] = min(max(int(np.floor(x[i] / merge_dist)), -limit), limit) + CELL_OFFSET
+            cy[i] = min(max(int(np.floor(y[i] / merge_dist)), -limit), limit) + CELL_OFFSET
+            keys[i] = (np.int64(planet[i]) << (2 * CELL_BITS)) | (cx[i] << CELL_BITS) | cy[i]
+        order = np.argsort(keys, kind="mergesort")
+        sorted_keys = keys[order]
+        alive[:] = 1
+        for i in range(n):
+            if not alive[i] or merged[i]:
+                continue
+            partner = -1
+            for gx in range(cx[i] - 1, cx[i] + 2):
+                for gy in range(cy[i] - 1, cy[i] + 2):
+                    key = (np.int64(planet[i]) << (2 * CELL_BITS)) | (gx << CELL_BITS) | gy
+                    k = np.searchsorted(sorted_keys, key)
+                    while k < n and sorted_keys[k] == key:
+                        j = order[k]
+                        k += 1
+                        if j <= i or (partner >= 0 and j >= partner):
+                            continue
+                        if not alive[j] or merged[j]:
+                            continue
+                        if math.hypot(x[j] - x[i], y[j] - y[i]) < merge_dist:
+                            partner = j
+            if partner < 0:
+                continue
+            j = partner
+            total_mass = mass[i] + mass[j]
+            vx[i] = ((vx[i] * mass[i] + vx[j] * mass[j]) / total_mass) * 0.7
+            vy[i] = ((vy[i] * mass[i] + vy[j] * mass[j]) / total_mass) * 0.7
+            x[i] = (x[i] + x[j]) / 2
+            y[i] = (y[i] + y[j]) / 2
+            mass[i] = total_mass
+            radius[i] = min(25.0, 1 + total_mass ** 0.3)
+            merged[i] = total_mass > planet_mass
+            alive[j] = 0
+
+    KERNELS = (apply_sun_gravity, merge_close_particles)
+
+else:
+    # Bez numba: gravitace vektorově v NumPy, slučování ve smyčce Pythonu nad slovníkem buněk
+    # (stejné pořadí párování jako jádro).
+
+    def apply_sun_gravity(x, y, vx, vy, center_x, center_y, gm, min_dist, damping):
+        dx = center_x - x
+        dy = center_y - y
+        dist = np.sqrt(dx*dx + dy*dy)
+        np.maximum(dist, min_dist, out=dist)
+        force = gm / (dist * dist * dist)
+        vx += force * dx
+        vy += force * dy
+        vx *= damping
+        vy *= damping
+        x += vx
+        y += vy
+
+    def merge_close_particles(x, y, vx, vy, mass, radius, planet, merged, merge_dist, planet_mass, alive):
+        # Stejný postup nad seznamy Pythonu, buňky ve slovníku
+        xs, ys, vxs, vys = x.tolist(), y.tolist(), vx.tolist(), vy.tolist()
+        masses, planets, flags = mass.tolist(), planet.tolist(), merged.tolist()
+        grid = {}
+        for i in range(len(xs)):
+            key = (planets[i], math.floor(xs[i] / merge_dist), math.floor(ys[i] / merge_dist))
+            grid.setdefault(key, []).append(i)
+        alive[:] = 1
+        for i in range(len(xs)):
+            if not alive[i] or flags[i]:
+                continue
+            cx = math.floor(xs[i] / merge_dist)
+            cy = math.floor(ys[i] / merge_dist)
+            partner = -1
+            for gx in range(cx - 1, cx + 2):
+                for gy in range(cy - 1, cy + 2):
+                    for j in grid.get((planets[i], gx, gy), ()):
+                        if j <= i or (partner >= 0 and j >= partner) or not alive[j] or flags[j]:
+                            continue
+                        if math.hypot(xs[j] - xs[i], ys[j] - ys[i]) < merge_dist:
+                            partner = j
+            if partner < 0:
+                continue
+            j = partner
+            total_mass = masses[i] + masses[j]
+            vxs[i] = ((vxs[i] * masses[i] + vxs[j] * masses[j]) / total_mass) * 0.7
+            vys[i] = ((vys[i] * masses[i] + vys[j] * masses[j]) / total_mass) * 0.7
+            xs[i] = (xs[i] + xs[j]) / 2
+            ys[i] = (ys[i] + ys[j]) / 2
+            masses[i] = total_mass
+            radius[i] = min(25.0, 1 + total_mass ** 0.3)
+            flags[i] = total_mass > planet_mass
+            alive[j] = 0
+        x[:], y[:], vx[:], vy[:], mass[:], merged[:] = xs, ys, vxs, vys, masses, flags
+
+    KERNELS = ()
+
+
+STARTUP_TIME = time.perf_counter() - start_time
+
+def startup_report():
+    return kernel_report(KERNELS, STARTUP_TIME)
@@ -0,0 +1,347 @@
+# jadra_soustava.py
+# Numba jádra pro Soustava.py.
+# Srážky bdících těles přes mřížku, posun spících těles po Keplerových drahách (Stumpffovy funkce)
+# a hledání izolovaných těles, která se mohou uspat.
+
+import math
+import time
+
+import numpy as np
+
+from jadra import CELL_BITS, CELL_OFFSET, NUMBA, kernel_report
+
+if NUMBA:
+    from numba import njit, prange
+
+start_time = time.perf_counter()
+
+# Koeficienty Taylorových řad Stumpffových funkcí, 1 / (2k + 2)! a 1 / (2k + 3)!
+STUMPFF_C = np.array([1.0 / math.factorial(2 * k + 2) for k in range(11)])
+STUMPFF_S = np.array([1.0 / math.factorial(2 * k + 3) for k in range(11)])
+
+if NUMBA:
+    @njit("void(float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], int32[::1], int32[::1], "
+          "int64, uint8[::1], uint8[::1])", cache=True, nogil=True)
+    def merge_touching_bodies(x, y, vx, vy, mass, radius, age, min_age, asleep, alive):
+        # Srážky pro Soustava.py v pevném pořadí indexů: každé bdící těleso starší než min_age pohltí
+        # první (nejnižší index) dotýkající se takové těleso, spojení zachová hmotnost a hybnost.
+        # Mřížka má buňku dvojnásobku největšího poloměru, dotýkající se tělesa jsou v sousedních buňkách.
+        alive[:] = 1
+        active = np.flatnonzero((age > min_age) & (asleep == 0))
+        m = active.shape[0]
+        if m == 0:
+            return
+        cell = 1.0
+        for i in active:
+            cell = max(cell, 2.0 * radius[i])
+        limit = CELL_OFFSET - 2
+        cx = np.empty(m, dtype=np.int64)
+        cy = np.empty(m, dtype=np.int64)
+        keys = np.empty(m, dtype=np.int64)
+        for a in range(m):
+            i = active[a]
+            cx[a] = min(max(int(np.floor(x[i] / cell)), -limit), limit) + CELL_OFFSET
+            cy[a] = min(max(int(np.floor(y[i] / cell)), -limit), limit) + CELL_OFFSET
+            keys[a] = (cx[a] << CELL_BITS) | cy[a]
+        order = np.argsort(keys, kind="mergesort")
+        sorted_keys = keys[order]
+        for a in range(m):
+            i = active[a]
+            if not alive[i]:
+                continue
+            partner = -1
+            for gx in range(cx[a] - 1, cx[a] + 2):
+                for gy in range(cy[a] - 1, cy[a] + 2):
+                    key = (gx << CELL_BITS) | gy
+                    k = np.searchsorted(sorted_keys, key)
+                    while k < m and sorted_keys[k] == key:
+                        j = active[order[k]]
+                        k += 1
+                        if j == i or (partner >= 0 and j >= partner) or not alive[j]:
+                            continue
+                        if math.hypot(x[j] - x[i], y[j] - y[i]) < radius[i] + radius[j]:
+                            partner = j
+            if partner < 0:
+                continue
+            j = partner
+            total_mass = mass[i] + mass[j]
+            x[i] = (x[i] * mass[i] + x[j] * mass[j]) / total_mass
+            y[i] = (y[i] * mass[i] + y[j] * mass[j]) / total_mass
+            vx[i] = (vx[i] * mass[i] + vx[j] * mass[j]) / total_mass
+            vy[i] = (vy[i] * mass[i] + vy[j] * mass[j]) / total_mass
+            mass[i] = total_mass
+            radius[i] = max(2, int(math.log(total_mass + 1) * 1.3))
+            alive[j] = 0
+
+    @njit("UniTuple(float64, 2)(float64)", cache=True, nogil=True)
+    def stumpff(z):
+        # Stumpffovy funkce C(z), S(z) pro univerzální proměnnou Keplerovy úlohy. Pro |z| < 1
+        # Taylorova řada C = sum (-z)^k / (2k + 2)!, S = sum (-z)^k / (2k + 3)! (do k = 10 na
+        # plnou přesnost float64) - je několikrát rychlejší než cosh/sinh.
+        if abs(z) < 1.0:
+            c = 0.0
+            s = 0.0
+            for k in range(10, -1, -1):
+                c = c * -z + STUMPFF_C[k]
+                s = s * -z + STUMPFF_S[k]
+            return c, s
+        if z > 0.0:
+            s = np.sqrt(z)
+            return (1.0 - np.cos(s)) / z, (s - np.sin(s)) / (s * s * s)
+        s = np.sqrt(-z)
+        return (np.cosh(s) - 1.0) / -z, (np.sinh(s) - s) / (s * s * s)
+
+    @njit("UniTuple(float64, 5)(float64, float64, float64, float64, float64, float64, float64)",
+          cache=True, nogil=True)
+    def kepler_propagate(x, y, vx, vy, mu, t, chi):
+        # Poloha a rychlost po čase t na keplerovské dráze kolem počátku (elipsa i hyperbola),
+        # Newtonova metoda pro univerzální anomálii chi. Vrací i chi - z minulého snímku je to
+        # dobrý odhad pro další, jinak (chi <= 0) se začne od sqrt(mu) * t / r0.
+        r0 = np.sqrt(x*x + y*y)
+        rv = (x*vx + y*vy) / np.sqrt(mu)
+        alpha = 2.0 / r0 - (vx*vx + vy*vy) / mu
+        sqrt_mu = np.sqrt(mu)
+        if chi <= 0.0:
+            chi = sqrt_mu * t / r0
+        for _ in range(50):
+            z = alpha * chi * chi
+            c, s = stumpff(z)
+            f = rv * chi * chi * c + (1.0 - alpha * r0) * chi * chi * chi * s + r0 * chi - sqrt_mu * t
+            df = rv * chi * (1.0 - z * s) + (1.0 - alpha * r0) * chi * chi * c + r0
+            step = f / df
+            chi -= step
+            if abs(step) < 1e-12 * (1.0 + abs(chi)):
+                break
+        z = alpha * chi * chi
+        c, s = stumpff(z)
+        f = 1.0 - chi * chi / r0 * c
+        g = t - chi * chi * chi * s / sqrt_mu
+        px = f * x + g * vx
+        py = f * y + g * vy
+        r = np.sqrt(px*px + py*py)
+        df = sqrt_mu / (r * r0) * chi * (z * s - 1.0)
+        dg = 1.0 - chi * chi / r * c
+        return px, py, df * x + dg * vx, df * y + dg * vy, chi
+
+    @njit("void(uint8[::1], float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], "
+          "float64, float64, float64, float64, float64, float64[::1], float64[::1], float64[::1], float64[::1])",
+          parallel=True, cache=True, nogil=True)
+    def advance_sleepers(asleep, sleep_x, sleep_y, sleep_vx, sleep_vy, sleep_chi, mass, gm, center_x, center_y, tau,
+                         vscale, x, y, vx, vy):
+        # Spící tělesa: poloha na keplerovské dráze od usnutí v přeškálovaném čase tau,
+        # rychlost zmenšená tlumením (vscale), gravitační parametr gm * hmotnost
+        for i in prange(x.shape[0]):
+            if not asleep[i]:
+                continue
+            px, py, ux, uy, sleep_chi[i] = kepler_propagate(sleep_x[i] - center_x, sleep_y[i] - center_y,
+                                                            sleep_vx[i], sleep_vy[i], gm * mass[i], tau, sleep_chi[i])
+            x[i] = center_x + px
+            y[i] = center_y + py
+            vx[i] = ux * vscale
+            vy[i] = uy * vscale
+
+    @njit("void(float64[::1], float64[::1], float64[::1], float64[::1], float64[::1], float64, uint8[::1])",
+          cache=True, nogil=True)
+    def find_isolated(x, y, vx, vy, reach, tau, isolated):
+        # Široká fáze pro uspávání: dráha tělesa na příštích tau je úsečka x + v * tau, její obálka
+        # (zvětšená o dosah - poloměr a rezervu) se vloží do všech buněk mřížky, které zasáhne. Dvojice
+        # se společnou buňkou a překrytými obálkami se přesně otestují na nejmenší vzdálenost
+        # během tau; kdo se k někomu přiblíží na součet dosahů, zůstane vzhůru.
+        n = x.shape[0]
+        isolated[:] = 1
+        if n < 2:
+            return
+        low_x = np.empty(n)
+        low_y = np.empty(n)
+        high_x = np.empty(n)
+        high_y = np.empty(n)
+        extent = 0.0
+        for i in range(n):
+            low_x[i] = min(x[i], x[i] + vx[i] * tau) - reach[i]
+            high_x[i] = max(x[i], x[i] + vx[i] * tau) + reach[i]
+            low_y[i] = min(y[i], y[i] + vy[i] * tau) - reach[i]
+            high_y[i] = max(y[i], y[i] + vy[i] * tau) + reach[i]
+            extent += max(high_x[i] - low_x[i], high_y[i] - low_y[i])
+        cell = max(extent / n, 1.0)
+
+        limit = CELL_OFFSET - 2
+        col0 = np.empty(n, dtype=np.int64)
+        col1 = np.empty(n, dtype=np.int64)
+        row0 = np.empty(n, dtype=np.int64)
+        row1 = np.empty(n, dtype=np.int64)
+        total = 0
+        for i in range(n):
+            col0[i] = max(int(np.floor(low_x[i] / cell)), -limit)
+            col1[i] = min(int(np.floor(high_x[i] / cell)), limit)
+            row0[i] = max(int(np.floor(low_y[i] / cell)), -limit)
+            row1[i] = min(int(np.floor(high_y[i] / cell)), limit)
+            total += max(col1[i] - col0[i] + 1, 0) * max(row1[i] - row0[i] + 1, 0)
+        keys = np.empty(total, dtype=np.int64)
+        owner = np.empty(total, dtype=np.int64)
+        e = 0
+        for i in range(n):
+            for gx in range(col0[i], col1[i] + 1):
+                for gy in range(row0[i], row1[i] + 1):
+                    keys[e] = ((gx + CELL_OFFSET) << CELL_BITS) | (gy + CELL_OFFSET)
+                    owner[e] = i
+                    e += 1
+        order = np.argsort(keys, kind="mergesort")
+
+        start = 0
+        while start < total:
+            end = start + 1
+            while end < total and keys[order[end]] == keys[order[start]]:
+                end += 1
+            for a in range(start, end):
+                i = owner[order[a]]
+                for b in range(a + 1, end):
+                    j = owner[order[b]]
+                    if isolated[i] == 0 and isolated[j] == 0:
+                        continue
+                    if low_x[i] > high_x[j] or low_x[j] > high_x[i] or low_y[i] > high_y[j] or low_y[j] > high_y[i]:
+                        continue
+                    dx = x[j] - x[i]
+                    dy = y[j] - y[i]
+                    dvx = vx[j] - vx[i]
+                    dvy = vy[j] - vy[i]
+                    dv_sq = dvx*dvx + dvy*dvy
+                    t = 0.0
+                    if dv_sq > 0.0:
+                        t = min(max(-(dx*dvx + dy*dvy) / dv_sq, 0.0), tau)
+                    cx = dx + dvx * t
+                    cy = dy + dvy * t
+                    limit_sq = (reach[i] + reach[j]) ** 2
+                    if cx*cx + cy*cy < limit_sq:
+                        isolated[i] = 0
+                        isolated[j] = 0
+            start = end
+
+    KERNELS = (merge_touching_bodies, stumpff, kepler_propagate, advance_sleepers, find_isolated)
+
+else:
+    # Bez numba: srážky ve smyčce Pythonu nad slovníkem buněk, Keplerovy dráhy vektorově v NumPy
+    # (Newtonovy iterace pro všechna spící tělesa naráz), izolovanost po buňkách slovníku s páry v NumPy.
+
+    def merge_touching_bodies(x, y, vx, vy, mass, radius, age, min_age, asleep, alive):
+        xs, ys, vxs, vys, masses = x.tolist(), y.tolist(), vx.tolist(), vy.tolist(), mass.tolist()
+        radii = radius.tolist()
+        alive[:] = 1
+        active = np.flatnonzero((age > min_age) & (asleep == 0)).tolist()
+        cell = max([1.0] + [2.0 * radii[i] for i in active])
+        grid = {}
+        for i in active:
+            grid.setdefault((math.floor(xs[i] / cell), math.floor(ys[i] / cell)), []).append(i)
+        for i in active:
+            if not alive[i]:
+                continue
+            cx = math.floor(xs[i] / cell)
+            cy = math.floor(ys[i] / cell)
+            partner = -1
+            for gx in range(cx - 1, cx + 2):
+                for gy in range(cy - 1, cy + 2):
+                    for j in grid.get((gx, gy), ()):
+                        if j == i or (partner >= 0 and j >= partner) or not alive[j]:
+                            continue
+                        if math.hypot(xs[j] - xs[i], ys[j] - ys[i]) < radii[i] + radii[j]:
+                            partner = j
+            if partner < 0:
+                continue
+            j = partner
+            total_mass = masses[i] + masses[j]
+            xs[i] = (xs[i] * masses[i] + xs[j] * masses[j]) / total_mass
+            ys[i] = (ys[i] * masses[i] + ys[j] * masses[j]) / total_mass
+            vxs[i] = (vxs[i] * masses[i] + vxs[j] * masses[j]) / total_mass
+            vys[i] = (vys[i] * masses[i] + vys[j] * masses[j]) / total_mass
+            masses[i] = total_mass
+            radii[i] = max(2, int(math.log(total_mass + 1) * 1.3))
+            alive[j] = 0
+        x[:], y[:], vx[:], vy[:], mass[:], radius[:] = xs, ys, vxs, vys, masses, radii
+
+    def stumpff(z):
+        small = np.abs(z) < 1.0
+        series_c = np.polyval(STUMPFF_C[::-1], -z)
+        series_s = np.polyval(STUMPFF_S[::-1], -z)
+        safe_z = np.where(small, 1.0, z)
+        s = np.sqrt(np.abs(safe_z))
+        c = np.where(safe_z > 0, (1.0 - np.cos(s)) / safe_z, (np.cosh(s) - 1.0) / -safe_z)
+        s3 = np.where(safe_z > 0, s - np.sin(s), np.sinh(s) - s) / s**3
+        return np.where(small, series_c, c), np.where(small, series_s, s3)
+
+    def kepler_propagate(x, y, vx, vy, mu, t, chi):
+        r0 = np.sqrt(x*x + y*y)
+        rv = (x*vx + y*vy) / np.sqrt(mu)
+        alpha = 2.0 / r0 - (vx*vx + vy*vy) / mu
+        sqrt_mu = np.sqrt(mu)
+        chi = np.where(chi > 0, chi, sqrt_mu * t / r0)
+        for _ in range(50):
+            z = alpha * chi * chi
+            c, s = stumpff(z)
+            f = rv * chi * chi * c + (1.0 - alpha * r0) * chi**3 * s + r0 * chi - sqrt_mu * t
+            df = rv * chi * (1.0 - z * s) + (1.0 - alpha * r0) * chi * chi * c + r0
+            step = f / df
+            chi = chi - step
+            if np.all(np.abs(step) < 1e-12 * (1.0 + np.abs(chi))):
+                break
+        z = alpha * chi * chi
+        c, s = stumpff(z)
+        f = 1.0 - chi * chi / r0 * c
+        g = t - chi**3 * s / sqrt_mu
+        px = f * x + g * vx
+        py = f * y + g * vy
+        r = np.sqrt(px*px + py*py)
+        df = sqrt_mu / (r * r0) * chi * (z * s - 1.0)
+        dg = 1.0 - chi * chi / r * c
+        return px, py, df * x + dg * vx, df * y + dg * vy, chi
+
+    def advance_sleepers(asleep, sleep_x, sleep_y, sleep_vx, sleep_vy, sleep_chi, mass, gm, center_x, center_y, tau,
+                         vscale, x, y, vx, vy):
+        i = np.flatnonzero(asleep)
+        if i.size == 0:
+            return
+        px, py, ux, uy, sleep_chi[i] = kepler_propagate(sleep_x[i] - center_x, sleep_y[i] - center_y, sleep_vx[i],
+                                                        sleep_vy[i], gm * mass[i], tau, sleep_chi[i])
+        x[i] = center_x + px
+        y[i] = center_y + py
+        vx[i] = ux * vscale
+        vy[i] = uy * vscale
+
+    def find_isolated(x, y, vx, vy, reach, tau, isolated):
+        isolated[:] = 1
+        low_x = np.minimum(x, x + vx * tau) - reach
+        high_x = np.maximum(x, x + vx * tau) + reach
+        low_y = np.minimum(y, y + vy * tau) - reach
+        high_y = np.maximum(y, y + vy * tau) + reach
+        if x.shape[0] < 2:
+            return
+        cell = max(float(np.mean(np.maximum(high_x - low_x, high_y - low_y))), 1.0)
+        grid = {}
+        for i in range(x.shape[0]):
+            for gx in range(math.floor(low_x[i] / cell), math.floor(high_x[i] / cell) + 1):
+                for gy in range(math.floor(low_y[i] / cell), math.floor(high_y[i] / cell) + 1):
+                    grid.setdefault((gx, gy), []).append(i)
+        for members in grid.values():
+            if len(members) < 2:
+                continue
+            i, j = np.triu_indices(len(members), 1)
+            i = np.array(members)[i]
+            j = np.array(members)[j]
+            dx = x[j] - x[i]
+            dy = y[j] - y[i]
+            dvx = vx[j] - vx[i]
+            dvy = vy[j] - vy[i]
+            dv_sq = dvx*dvx + dvy*dvy
+            t = np.clip(-(dx*dvx + dy*dvy) / np.where(dv_sq > 0, dv_sq, 1.0), 0.0, tau)
+            t[dv_sq == 0] = 0.0
+            cx = dx + dvx * t
+            cy = dy + dvy * t
+            close = cx*cx + cy*cy < (reach[i] + reach[j]) ** 2
+            isolated[i[close]] = 0
+            isolated[j[close]] = 0
+
+    KERNELS = ()
+
+
+STARTUP_TIME = time.perf_counter() - start_time
+
+def startup_report():
+    return kernel_report(KERNELS, STARTUP_TIME)
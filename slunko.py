@@ -1,14 +1,14 @@
 import pygame
-import math
+import argparse
 import random
+import time
+import numpy as np
+
+from jadra_slunko import apply_sun_gravity, merge_close_particles
 
-pygame.init()
 WIDTH, HEIGHT = 1200, 1200
 CENTER = (WIDTH // 2, HEIGHT // 2)
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Vznik sluneční soustavy")
 
-clock = pygame.time.Clock()
 BLACK = (0, 0, 0)
 YELLOW = (255, 255, 0)
 
@@ -37,135 +37,156 @@ planet_data = [
 G = 6.67430e-1  # zmenšená gravitační konstanta pro simulaci
 SUN_MASS = 10000
 MIN_DIST_FROM_SUN = 20  # minimální vzdálenost od středu Slunce
-
-particles = []
-planets = []
+MERGE_DIST = 3  # částice téže planety blíž než tohle se slijí
+
+PLANET_MASS = 20  # sloučená částice těžší než tohle se stane planetou
+
+MAX_WARP = 1024  # nejvíc kroků simulace na jeden vykreslený snímek
+
+class Bodies:
+    # Částice i planety ve sloupcích NumPy polí, planety mají merged = 1.
+    # Barva se bere z PLANET_COLORS podle čísla planety.
+    def __init__(self, count):
+        self.x = np.zeros(count)
+        self.y = np.zeros(count)
+        self.vx = np.zeros(count)
+        self.vy = np.zeros(count)
+        self.mass = np.ones(count)
+        self.radius = np.ones(count)
+        self.planet = np.zeros(count, dtype=np.int32)
+        self.merged = np.zeros(count, dtype=np.uint8)
+
+    @property
+    def count(self):
+        return self.x.shape[0]
+
+    def keep(self, mask):
+        self.x = self.x[mask]
+        self.y = self.y[mask]
+        self.vx = self.vx[mask]
+        self.vy = self.vy[mask]
+        self.mass = self.mass[mask]
+        self.radius = self.radius[mask]
+        self.planet = self.planet[mask]
+        self.merged = self.merged[mask]
+
+bodies = Bodies(0)
 
 def generate_particles():
-    for data in planet_data:
+    global bodies
+    bodies = Bodies(sum(data["particles"] for data in planet_data))
+    start = 0
+    for index, data in enumerate(planet_data):
         count = data["particles"]
-        dist_base = data["distance"]
-        color = data["color"]
-        name = data["name"]
-        for i in range(count):
-            angle = 2 * math.pi * i / count
-            dist = dist_base + random.uniform(-5, 5)
-            x = CENTER[0] + dist * math.cos(angle)
-            y = CENTER[1] + dist * math.sin(angle)
-            # Přesná tangenciální rychlost pro kruhovou orbitu
-            speed = math.sqrt(G * SUN_MASS / dist)
-            vx = -math.sin(angle) * speed
-            vy = math.cos(angle) * speed
-            particles.append({
-                "x": x,
-                "y": y,
-                "vx": vx,
-                "vy": vy,
-                "mass": 1,
-                "radius": 1,
-                "color": color,
-                "planet": name,
-                "merged": False,
-            })
-
-def draw_sun():
+        end = start + count
+        angle = 2 * np.pi * np.arange(count) / count
+        dist = data["distance"] + np.array([random.uniform(-5, 5) for _ in range(count)])
+        bodies.x[start:end] = CENTER[0] + dist * np.cos(angle)
+        bodies.y[start:end] = CENTER[1] + dist * np.sin(angle)
+        # Přesná tangenciální rychlost pro kruhovou orbitu
+        speed = np.sqrt(G * SUN_MASS / dist)
+        bodies.vx[start:end] = -np.sin(angle) * speed
+        bodies.vy[start:end] = np.cos(angle) * speed
+        bodies.planet[start:end] = index
+        start = end
+
+def draw_sun(screen):
     pygame.draw.circle(screen, YELLOW, CENTER, 15)
 
-def apply_gravity(p):
-    dx = CENTER[0] - p["x"]
-    dy = CENTER[1] - p["y"]
-    dist = math.hypot(dx, dy)
-    if dist < MIN_DIST_FROM_SUN:
-        dist = MIN_DIST_FROM_SUN  # nepujde blíže k Slunci, aby nespadl
-    force = G * SUN_MASS / (dist ** 2)
-    ax = force * dx / dist
-    ay = force * dy / dist
-    return ax, ay
-
 def update_motion():
+    # Jeden krok pro všechny částice i planety najednou
     damping = 0.995  # tlumení rychlosti
-    for p in particles:
-        ax, ay = apply_gravity(p)
-        p["vx"] += ax
-        p["vy"] += ay
-        p["vx"] *= damping
-        p["vy"] *= damping
-        p["x"] += p["vx"]
-        p["y"] += p["vy"]
-
-    for p in planets:
-        ax, ay = apply_gravity(p)
-        p["vx"] += ax
-        p["vy"] += ay
-        p["vx"] *= damping
-        p["vy"] *= damping
-        p["x"] += p["vx"]
-        p["y"] += p["vy"]
+    apply_sun_gravity(bodies.x, bodies.y, bodies.vx, bodies.vy, CENTER[0], CENTER[1], G * SUN_MASS,
+                      MIN_DIST_FROM_SUN, damping)
 
 def merge_particles():
-    global particles, planets
-    new_particles = []
-    used = set()
-    for i, p in enumerate(particles):
-        if i in used or p["merged"]:
-            continue
-        merged = False
-        for j in range(i + 1, len(particles)):
-            if j in used or particles[j]["merged"]:
-                continue
-            other = particles[j]
-            if p["planet"] != other["planet"]:
-                continue
-            dx = other["x"] - p["x"]
-            dy = other["y"] - p["y"]
-            dist = math.hypot(dx, dy)
-            if dist < 3:
-                total_mass = p["mass"] + other["mass"]
-                new_vx = ((p["vx"] * p["mass"] + other["vx"] * other["mass"]) / total_mass) * 0.7
-                new_vy = ((p["vy"] * p["mass"] + other["vy"] * other["mass"]) / total_mass) * 0.7
-                new_particle = {
-                    "x": (p["x"] + other["x"]) / 2,
-                    "y": (p["y"] + other["y"]) / 2,
-                    "vx": new_vx,
-                    "vy": new_vy,
-                    "mass": total_mass,
-                    "radius": min(25, 1 + total_mass ** 0.3),
-                    "color": p["color"],
-                    "planet": p["planet"],
-                    "merged": False,
-                }
-                if total_mass > 20:
-                    new_particle["merged"] = True
-                    planets.append(new_particle)
-                else:
-                    new_particles.append(new_particle)
-                used.add(j)
-                merged = True
-                break
-        if not merged:
-            new_particles.append(p)
-    particles = new_particles
-
-def draw_objects():
-    for p in particles:
-        pygame.draw.circle(screen, p["color"], (int(p["x"]), int(p["y"])), 1)
-    for p in planets:
-        pygame.draw.circle(screen, p["color"], (int(p["x"]), int(p["y"])), int(p["radius"]))
-
-generate_particles()
-
-running = True
-while running:
-    screen.fill(BLACK)
-    draw_sun()
-    update_motion()
-    merge_particles()
-    draw_objects()
-    pygame.display.flip()
-    clock.tick(240)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-pygame.quit()
+    alive = np.empty(bodies.count, dtype=np.uint8)
+    merge_close_particles(bodies.x, bodies.y, bodies.vx, bodies.vy, bodies.mass, bodies.radius, bodies.planet,
+                          bodies.merged, MERGE_DIST, PLANET_MASS, alive)
+    if not alive.all():
+        bodies.keep(alive.view(bool))
+
+def planet_count():
+    return int(np.count_nonzero(bodies.merged))
+
+def simulate(steps):
+    for _ in range(steps):
+        update_motion()
+        merge_particles()
+
+def draw_objects(screen):
+    # Nejdřív částice, planety přes ně
+    for merged in (0, 1):
+        pick = bodies.merged == merged
+        for x, y, radius, planet in zip(bodies.x[pick].tolist(), bodies.y[pick].tolist(),
+                                        bodies.radius[pick].tolist(), bodies.planet[pick].tolist()):
+            pygame.draw.circle(screen, PLANET_COLORS[planet], (int(x), int(y)), int(radius) if merged else 1)
+
+def main():
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Vznik sluneční soustavy")
+    clock = pygame.time.Clock()
+    font = pygame.font.SysFont(None, 24)
+
+    # Zrychlení času: warp kroků simulace na snímek, vykreslí se jen poslední (šipky nahoru/dolů)
+    warp = 1
+    steps = 0
+    steps_per_second = 0.0
+    measure_start = time.perf_counter()
+
+    running = True
+    while running:
+        simulate(warp)
+        steps += warp
+        now = time.perf_counter()
+        if now - measure_start >= 0.5:
+            steps_per_second = steps / (now - measure_start)
+            steps = 0
+            measure_start = now
+
+        screen.fill(BLACK)
+        draw_sun(screen)
+        draw_objects(screen)
+        info = font.render(f"Zrychlení: {warp}x   {steps_per_second:.0f} kroků/s   Planety: {planet_count()}",
+                           True, (200, 200, 200))
+        screen.blit(info, (20, HEIGHT - 30))
+        pygame.display.flip()
+        clock.tick(240)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_UP:
+                    warp = min(warp * 2, MAX_WARP)
+                elif event.key == pygame.K_DOWN:
+                    warp = max(warp // 2, 1)
+
+    pygame.quit()
+
+def run_until(planets, max_steps):
+    # Bez okna a bez čekání na snímky: simuluje, dokud nevznikne zadaný počet planet
+    start = time.perf_counter()
+    steps = 0
+    while planet_count() < planets and steps < max_steps:
+        simulate(1)
+        steps += 1
+    elapsed = time.perf_counter() - start
+    result = "hotovo" if planet_count() >= planets else "limit kroků"
+    print(f"{result}: {planet_count()} planet, {bodies.count - planet_count()} částic, {steps} kroků, "
+          f"{elapsed:.2f} s ({steps / max(elapsed, 1e-9):.0f} kroků/s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vznik sluneční soustavy")
+    parser.add_argument("--seed", type=int, help="semínko náhodného rozmístění částic")
+    parser.add_argument("--until-planets", type=int, metavar="N", help="bez okna simulovat do N planet")
+    parser.add_argument("--max-steps", type=int, default=100000, help="limit kroků pro --until-planets")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    generate_particles()
+    if args.until_planets is not None:
+        run_until(args.until_planets, args.max_steps)
+    else:
+        main()
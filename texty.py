@@ -0,0 +1,22 @@
+# texty.py
+# Sdílené vykreslování textů pro HUD v O.py, Gravitace.py, Galai.py, Soustava.py a hokej.py.
+# Písma se v systému hledají jen jednou a vykreslené nápisy se drží v LRU cache podle
+# (písmo, text, barva), takže se nápis vykreslí znovu, jen když se změní.
+# Vrácené Surface jsou sdílené - jen se blitují, nikdy se do nich nekreslí.
+# Kolik času cache ušetří, měří texty_mereni.py.
+
+import functools
+
+import pygame
+
+TEXT_CACHE_SIZE = 256   # Nápisů v cache, měnící se čísla vytlačí nejdéle nepoužité
+
+@functools.lru_cache(maxsize=None)
+def load_font(name, size, bold=False):
+    # pygame.font.SysFont prochází písma nainstalovaná v systému, to se vyplatí jen jednou
+    return pygame.font.SysFont(name, size, bold=bold)
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font, text, color):
+    # Barva musí být n-tice, aby šla použít jako klíč
+    return font.render(text, True, color)
@@ -0,0 +1,52 @@
+# texty_mereni.py
+# Měří, kolik času za snímek ušetří cache z texty.py. Nápisy jsou vzorek typického snímku HUD
+# jednotlivých ukázek (počet, délka, kolik se jich mění), ne jejich přesná kopie.
+#   python texty_mereni.py
+
+import time
+
+import pygame
+
+from texty import load_font, render_text
+
+# Vzorek HUD ukázek: písmo, nápisy typického snímku, kolik z nich se mění každý snímek
+# a jestli ukázka dřív hledala písmo v každém snímku
+DEMOS = [
+    ("O.py", ("Arial", 24), ["Částic: 5000", "Síla: 2.0", "Režim: Přitahování", "Život (L): vypnutý",
+                             "Regulátor (G): 3.2 / 16.6 ms, drží"], 1, True),
+    ("Gravitace.py", (None, 24), ["Počet částic: 20000", "Rychlost: 1.0x", "Vzájemná gravitace (N): vyp",
+                                  "Integrátor (I, +/-): leapfrog x1, 600 kroků: drift E +0.001 %, L +0.000 %",
+                                  "Přitahovače (A, Delete, tažení myší): 1",
+                                  "Fyzika ([ ]): 120/120 Hz   Vykreslování (, .): 60/60 FPS"], 1, False),
+    ("Galai.py", (None, 24), ["Gravitace disku: vypnutá (P)", "Zobrazení: částice (G)", "Počet částic: 1000",
+                              "Rychlost: 1.0x"], 0, False),
+    ("Soustava.py", ("Arial", 16), ["Částic: 1187 (spí 912) | SPACE: pauza | R: reset | S: uspávání zapnuto | "
+                                    "K: uložit | L: načíst"], 0, False),
+    ("hokej.py", ("Arial", 48), ["ESC - Quit"], 0, False),
+    ("hokej.py (skóre)", ("Arial", 97, True), ["3", "5"], 0, False),
+]
+
+def measure(frames=300):
+    pygame.font.init()
+    color = (255, 255, 255)
+    for name, font_args, texts, changing, font_per_frame in DEMOS:
+        font = load_font(*font_args)
+        start = time.perf_counter()
+        for frame in range(frames):
+            if font_per_frame:
+                font = pygame.font.SysFont(*font_args)
+            for text in texts:
+                font.render(text, True, color)
+        before = (time.perf_counter() - start) / frames * 1000
+
+        font = load_font(*font_args)
+        start = time.perf_counter()
+        for frame in range(frames):
+            for i, text in enumerate(texts):
+                # Měnící se nápisy mají v každém snímku jiný text
+                render_text(font, f"{text} {frame}" if i < changing else text, color)
+        after = (time.perf_counter() - start) / frames * 1000
+        print(f"{name:18} {before:7.3f} ms -> {after:7.3f} ms za snímek")
+
+if __name__ == "__main__":
+    measure()